@@ -0,0 +1,93 @@
+"""
+Recall@k and latency of the LSH similar-case backend against exact search.
+
+    python benchmarks/ann_recall.py --rows 500000 --terms 5000 --bits 8 --tables 16,32,64
+
+The corpus is synthetic: sparse TF-IDF-like rows drawn around random "template"
+test cases, so there are many near neighbours but few exact ties.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from scipy import sparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "source"))
+from predictor.similarity import SimilarityIndex
+from predictor.ann import LSH_BITS, LSH_TABLES, LSHIndex
+
+
+def synthetic_corpus(n_rows, n_terms, n_templates, terms_per_case, seed):
+    rng = np.random.default_rng(seed)
+    templates = rng.integers(0, n_terms, size=(n_templates, terms_per_case))
+    owner = rng.integers(0, n_templates, size=n_rows)
+    cols = templates[owner]
+    # Replace about a quarter of each case's terms so neighbours are not identical
+    noise = rng.random(cols.shape) < 0.25
+    cols[noise] = rng.integers(0, n_terms, size=noise.sum())
+    data = rng.random(cols.shape) + 0.5
+    rows = np.repeat(np.arange(n_rows), terms_per_case)
+    X = sparse.csr_matrix((data.ravel(), (rows, cols.ravel())), shape=(n_rows, n_terms))
+    X.sum_duplicates()
+    return X
+
+
+def recall_at_k(index, exact, approx, queries, k):
+    """Tie-aware recall: an approximate hit counts if it scores at least the exact k-th best."""
+    hits = 0
+    for q, exact_ids, approx_ids in zip(queries, exact, approx):
+        scores = (index.rows @ q.T).toarray().ravel()
+        kth = min(scores[index.positions[i][0]] for i in exact_ids)
+        hits += sum(scores[index.positions[i][0]] >= kth - 1e-12 for i in approx_ids[:k])
+    return hits / (k * len(exact))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--terms", type=int, default=5_000)
+    parser.add_argument("--templates", type=int, default=2_000)
+    parser.add_argument("--terms-per-case", type=int, default=12)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--bits", type=int, default=LSH_BITS)
+    parser.add_argument("--tables", default=f"{LSH_TABLES // 2},{LSH_TABLES},{LSH_TABLES * 2}")
+    parser.add_argument("-k", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    X = synthetic_corpus(args.rows, args.terms, args.templates, args.terms_per_case, args.seed)
+    index = SimilarityIndex.build(X, [f"TC{i}" for i in range(args.rows)])
+    rng = np.random.default_rng(args.seed + 1)
+    picked = rng.choice(args.rows, size=args.queries, replace=False)
+    queries = [index.rows[i] for i in picked]
+    exclude = [[index.test_ids[i]] for i in picked]
+    print(f"corpus: {args.rows} rows x {args.terms} terms, {X.nnz} non-zeros, {args.queries} queries")
+
+    # Query one case at a time, as the GUI does, so latencies are comparable
+    exact, exact_ms = [], []
+    for q, ex in zip(queries, exclude):
+        start = time.perf_counter()
+        exact.extend(index.query(q, k=args.k, exclude_ids=ex))
+        exact_ms.append((time.perf_counter() - start) * 1000)
+    print(f"exact      p50 {np.percentile(exact_ms, 50):8.2f} ms  p95 {np.percentile(exact_ms, 95):8.2f} ms")
+
+    for n_tables in [int(t) for t in args.tables.split(",")]:
+        start = time.perf_counter()
+        lsh = LSHIndex(index, n_tables=n_tables, n_bits=args.bits, seed=args.seed)
+        build_s = time.perf_counter() - start
+        approx, approx_ms = [], []
+        for q, ex in zip(queries, exclude):
+            start = time.perf_counter()
+            approx.extend(lsh.query(q, k=args.k, exclude_ids=ex))
+            approx_ms.append((time.perf_counter() - start) * 1000)
+        recall = recall_at_k(index, exact, approx, queries, args.k)
+        print(
+            f"lsh T={n_tables:<3} p50 {np.percentile(approx_ms, 50):8.2f} ms  p95 {np.percentile(approx_ms, 95):8.2f} ms"
+            f"  recall@{args.k} {recall:.3f}  (build {build_s:.1f}s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Latency of the duration regressor: sklearn's RandomForestRegressor.predict
+against the flattened predictor.forest.FrozenForest, at several batch sizes.
+
+    python benchmarks/forest_latency.py --batch-sizes 1,100,10000
+    python benchmarks/forest_latency.py --bundle source/bundle
+
+"frozen" is the forest frozen from reg.pkl, which hands batches of NATIVE_MIN_ROWS
+and more back to sklearn; with --bundle, "bundle" is the forest memory-mapped from
+a bundle, which always walks the node records. Batches are rows of the training
+features (X_features.pkl) drawn at random. All must return bit-identical
+predictions for every batch.
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+import warnings
+
+import numpy as np
+
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "source")
+sys.path.insert(0, SOURCE_DIR)
+from predictor.bundle import Bundle
+from predictor.forest import NATIVE_MIN_ROWS, FrozenForest
+
+
+def load_pickle(path):
+    with warnings.catch_warnings():
+        # reg.pkl may come from an older sklearn; the benchmark checks the outputs anyway
+        warnings.simplefilter("ignore")
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+
+def measure(predict, X, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        y = predict(X)
+        best = min(best, time.perf_counter() - start)
+    return y, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=os.path.join(SOURCE_DIR, "reg.pkl"))
+    parser.add_argument("--features", default=os.path.join(SOURCE_DIR, "X_features.pkl"))
+    parser.add_argument("--batch-sizes", default="1,100,10000")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--bundle", help="also time the forest of this bundle directory")
+    args = parser.parse_args()
+
+    reg = load_pickle(args.model)
+    X_features = load_pickle(args.features)
+    start = time.perf_counter()
+    forest = FrozenForest.from_sklearn(reg)
+    print(f"{len(forest.roots)} trees, {len(forest.nodes)} nodes, flattened in {time.perf_counter() - start:.2f}s")
+    print(f"frozen uses sklearn from {NATIVE_MIN_ROWS} rows" if forest.native is not None else "frozen never uses sklearn")
+    candidates = {"frozen": forest}
+    if args.bundle:
+        start = time.perf_counter()
+        candidates["bundle"] = Bundle(args.bundle).load("reg")
+        print(f"bundle forest opened in {(time.perf_counter() - start) * 1e3:.1f}ms")
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'batch':>8} {'sklearn ms':>12}" + "".join(f" {name + ' ms':>12} {'speed-up':>9}" for name in candidates))
+    for batch_size in map(int, args.batch_sizes.split(",")):
+        X = X_features[rng.integers(0, X_features.shape[0], batch_size)]
+        # Large batches are slow enough that a few runs give a stable best time
+        repeat = max(3, args.repeat * 100 // max(100, batch_size))
+        expected, sklearn_time = measure(reg.predict, X, repeat)
+        line = f"{batch_size:>8} {sklearn_time * 1e3:>12.2f}"
+        for name, candidate in candidates.items():
+            y, elapsed = measure(candidate.predict, X, repeat)
+            if not np.array_equal(y, expected):
+                sys.exit(f"{name} predictions differ from sklearn at batch size {batch_size}")
+            line += f" {elapsed * 1e3:>12.2f} {sklearn_time / elapsed:>8.1f}x"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
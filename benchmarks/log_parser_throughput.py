@@ -0,0 +1,88 @@
+"""
+Lines per second of the log parser (data_prep.iter_test_cases).
+
+    python benchmarks/log_parser_throughput.py --copies 500
+
+The input is logs_1.txt repeated --copies times (with renumbered test case ids).
+The previous parser loop (three regex searches per line, each repeated on a
+match, and strptime for every timestamp) is timed as a reference, and both
+must produce identical records.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+DATA_PREP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data_processing", "original data processing")
+sys.path.insert(0, DATA_PREP_DIR)
+import data_prep
+
+
+def legacy_iter_test_cases(lines):
+    testcase_start_pattern = re.compile(r"\[TESTCASE\].*?(TestCase\d+_[\w\d_]+)")
+    step_pattern = re.compile(r"\[STEP\]\s*\d+:\s*(.+)")
+    timestamp_pattern = re.compile(r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3})")
+    result_pattern = re.compile(r"\b(PASS|FAIL)\b", re.IGNORECASE)
+    current_case = None
+    current_steps, current_all_words = [], []
+    current_start = current_result = last_timestamp = None
+    for line in lines:
+        timestamp_match = timestamp_pattern.match(line)
+        timestamp = datetime.strptime(timestamp_match.group(1), "%Y-%m-%d %H:%M:%S,%f") if timestamp_match else None
+        if testcase_start_pattern.search(line):
+            if current_case:
+                yield data_prep.make_record(current_case, len(current_steps), current_all_words, current_start, last_timestamp, current_result)
+            current_case = testcase_start_pattern.search(line).group(1)
+            current_steps, current_all_words = [], []
+            current_start = timestamp
+            current_result = None
+        if step_pattern.search(line):
+            desc = step_pattern.search(line).group(1).strip()
+            current_steps.append(desc)
+            current_all_words.extend(desc.split())
+        if result_pattern.search(line):
+            current_result = result_pattern.search(line).group(1).upper()
+        if timestamp:
+            last_timestamp = timestamp
+    if current_case:
+        yield data_prep.make_record(current_case, len(current_steps), current_all_words, current_start, last_timestamp, current_result)
+
+
+def build_lines(copies):
+    with open(os.path.join(DATA_PREP_DIR, "logs_1.txt"), encoding="utf-8") as f:
+        template = f.read()
+    lines = []
+    for i in range(copies):
+        lines.extend(template.replace("TestCase0", f"TestCase{i:05d}").splitlines(keepends=True))
+    return lines
+
+
+def measure(parser, lines, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        records = list(parser(lines))
+        best = min(best, time.perf_counter() - start)
+    return records, len(lines) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--copies", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    lines = build_lines(args.copies)
+    print(f"{len(lines)} lines, {sum(map(len, lines)) / 1e6:.1f} MB")
+    legacy_records, legacy_rate = measure(legacy_iter_test_cases, lines, args.repeat)
+    records, rate = measure(data_prep.iter_test_cases, lines, args.repeat)
+    if records != legacy_records:
+        sys.exit("data_prep.iter_test_cases output differs from the reference parser")
+    print(f"reference loop       {legacy_rate:12,.0f} lines/s")
+    print(f"data_prep            {rate:12,.0f} lines/s   ({rate / legacy_rate:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
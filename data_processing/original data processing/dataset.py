@@ -0,0 +1,116 @@
+"""
+Columnar (Parquet) storage for parsed test cases, partitioned by run date.
+
+    parsed_test_cases/
+        run_date=2025-03-14/part-0.parquet
+        run_date=2025-03-15/part-0.parquet
+        run_date=__HIVE_DEFAULT_PARTITION__/part-0.parquet   (cases without a timestamp)
+
+    python dataset.py parsed_test_cases_augmented.csv -o parsed_test_cases
+
+Columns are typed (num_steps is an integer, duration a float) and compressed,
+so readers skip csv parsing entirely and can load only the columns and dates
+they need:
+
+    read_dataset("parsed_test_cases", columns=["step_keywords", "num_steps"])
+
+Needs pyarrow (pip install pyarrow); data_prep.py and ingest.py only import
+this module when asked for --format parquet.
+"""
+import argparse
+import os
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as ds
+
+from data_prep import CHUNK_SIZE
+
+DATASET_DIR = "parsed_test_cases"
+
+SCHEMA = pa.schema([
+    ("test_id", pa.string()),
+    ("num_steps", pa.int32()),
+    ("step_keywords", pa.string()),
+    ("duration", pa.float64()),
+    ("result", pa.string()),
+    ("run_date", pa.date32()),
+])
+PARTITIONING = ds.partitioning(pa.schema([SCHEMA.field("run_date")]), flavor="hive")
+
+
+def iter_record_batches(records, chunk_size=CHUNK_SIZE):
+    """Group record dicts (see data_prep.make_record) into typed RecordBatches."""
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield pa.RecordBatch.from_pylist(chunk, schema=SCHEMA)
+            chunk = []
+    if chunk:
+        yield pa.RecordBatch.from_pylist(chunk, schema=SCHEMA)
+
+
+def write_dataset(records, root=DATASET_DIR, chunk_size=CHUNK_SIZE, basename="part"):
+    """
+    Stream records into root, one directory per run date. Files named basename-*.parquet
+    in the touched partitions are overwritten, files with other basenames are kept (so
+    several writers can share one dataset). Returns the record count.
+    """
+    count = 0
+
+    def counted(batches):
+        nonlocal count
+        for batch in batches:
+            count += batch.num_rows
+            yield batch
+
+    _write(counted(iter_record_batches(records, chunk_size)), root, basename)
+    return count
+
+
+def _write(data, root, basename):
+    ds.write_dataset(
+        data, root, schema=SCHEMA, format="parquet", partitioning=PARTITIONING,
+        basename_template=basename + "-{i}.parquet", existing_data_behavior="overwrite_or_ignore",
+    )
+
+
+def open_dataset(root=DATASET_DIR):
+    return ds.dataset(root, format="parquet", partitioning=PARTITIONING, schema=SCHEMA)
+
+
+def read_dataset(root=DATASET_DIR, columns=None, start_date=None, end_date=None):
+    """
+    Load the dataset as a pandas DataFrame. Only the requested columns are read, and
+    start_date / end_date (datetime.date, inclusive) skip whole run-date partitions.
+    """
+    condition = None
+    if start_date is not None:
+        condition = ds.field("run_date") >= start_date
+    if end_date is not None:
+        upper = ds.field("run_date") <= end_date
+        condition = upper if condition is None else condition & upper
+    return open_dataset(root).to_table(columns=columns, filter=condition).to_pandas()
+
+
+def csv_to_dataset(csv_path, root=DATASET_DIR, basename="part"):
+    """Convert a parsed csv (which has no run_date column) into a dataset. Returns the row count."""
+    types = {field.name: field.type for field in SCHEMA if field.name != "run_date"}
+    table = pa_csv.read_csv(csv_path, convert_options=pa_csv.ConvertOptions(column_types=types))
+    table = table.append_column("run_date", pa.nulls(table.num_rows, pa.date32()))
+    _write(table.select(SCHEMA.names), root, basename)
+    return table.num_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a parsed test case csv into a Parquet dataset.")
+    parser.add_argument("csv")
+    parser.add_argument("-o", "--output", default=DATASET_DIR, help="dataset directory")
+    args = parser.parse_args()
+    count = csv_to_dataset(args.csv, args.output)
+    print(f"{count} test cases written to {os.path.abspath(args.output)}")
+
+
+if __name__ == "__main__":
+    main()
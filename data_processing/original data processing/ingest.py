@@ -0,0 +1,108 @@
+"""
+Parse every test bench log of a night in parallel and merge them into one csv.
+
+    python ingest.py nightly_logs/ -o parsed_test_cases.csv
+    python ingest.py "logs/bench_*.txt" --workers 16
+    python ingest.py nightly_logs/ --format parquet -o parsed_test_cases
+
+Each log is parsed by its own worker process (see data_prep.iter_test_cases)
+into a part file; the parts are then concatenated in sorted file-name order,
+so the output does not depend on which worker finishes first. With --format
+parquet every worker writes its own files straight into the run-date partitions
+of the dataset (see dataset.py) and there is nothing to merge.
+"""
+import argparse
+import glob
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from data_prep import FIELDNAMES, OUTPUT_CSV, iter_test_cases, write_csv
+
+LOG_PATTERNS = ("*.txt", "*.log")
+
+
+def find_logs(source):
+    """A directory means every *.txt / *.log inside it; anything else is a glob pattern."""
+    if os.path.isdir(source):
+        paths = [p for pattern in LOG_PATTERNS for p in glob.glob(os.path.join(source, pattern))]
+    else:
+        paths = glob.glob(source)
+    return sorted(set(paths))
+
+
+def parse_log(log_path, part_path):
+    """Worker: parse one log into a header-less part csv. Returns the record count."""
+    with open(log_path, encoding="utf-8") as f:
+        return write_csv(iter_test_cases(f), part_path, header=False)
+
+
+def ingest(log_paths, output=OUTPUT_CSV, workers=None):
+    """Parse log_paths in parallel and merge them, in the given order, into output."""
+    out_dir = os.path.dirname(os.path.abspath(output))
+    with tempfile.TemporaryDirectory(dir=out_dir, prefix=".ingest-") as tmp:
+        parts = [os.path.join(tmp, f"part-{i:05d}.csv") for i in range(len(log_paths))]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            counts = list(pool.map(parse_log, log_paths, parts))
+
+        with open(output, "w", newline="", encoding="utf-8") as out:
+            out.write(",".join(FIELDNAMES) + "\n")
+            for part in parts:
+                with open(part, encoding="utf-8") as f:
+                    shutil.copyfileobj(f, out)
+    return dict(zip(log_paths, counts))
+
+
+def parse_log_to_dataset(log_path, root, basename):
+    """Worker: parse one log into its own basename-*.parquet files of the dataset."""
+    from dataset import write_dataset
+
+    with open(log_path, encoding="utf-8") as f:
+        return write_dataset(iter_test_cases(f), root, basename=basename)
+
+
+def ingest_dataset(log_paths, root, workers=None):
+    """Parse log_paths in parallel into a fresh Parquet dataset at root."""
+    parent = os.path.dirname(os.path.abspath(root))
+    tmp = tempfile.mkdtemp(dir=parent, prefix=".ingest-")
+    try:
+        basenames = [f"part-{i:05d}" for i in range(len(log_paths))]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            counts = list(pool.map(parse_log_to_dataset, log_paths, [tmp] * len(log_paths), basenames))
+        # Replace the previous dataset only once every log parsed
+        if os.path.isdir(root):
+            shutil.rmtree(root)
+        os.rename(tmp, root)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return dict(zip(log_paths, counts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="directory of logs or glob pattern (quote it)")
+    parser.add_argument("-o", "--output", help=f"csv file or dataset directory (default: {OUTPUT_CSV})")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    log_paths = find_logs(args.source)
+    if not log_paths:
+        parser.error(f"no logs found for {args.source!r}")
+    if args.format == "parquet":
+        from dataset import DATASET_DIR
+
+        args.output = args.output or DATASET_DIR
+        counts = ingest_dataset(log_paths, args.output, args.workers)
+    else:
+        args.output = args.output or OUTPUT_CSV
+        counts = ingest(log_paths, args.output, args.workers)
+    for path, count in counts.items():
+        print(f"{path}: {count} test cases")
+    print(f"{sum(counts.values())} test cases from {len(counts)} logs written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
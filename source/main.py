@@ -1,17 +1,27 @@
 import tkinter as tk
 from tkinter import ttk
+from tkinter import font as tkfont
 import re
-import pickle
-import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 from tkinter import filedialog
 import csv
 from fpdf import FPDF
 from datetime import datetime
 import sys, os
+from predictor.registry import ModelHandle, ARTIFACTS
+from predictor.engine import parse_and_predict, validate_detailed_test_case
+from predictor.cache import PredictionCache
+from predictor.jobs import PredictionJob
+from predictor.ranking import ResultTable, SORT_KEYS
 
 current_sort_mode = 0  # 0: Priority, 1: Duration, 2: Pass Rate, 3: TCID
-current_results = []
+current_results = None  # ResultTable of the last ordered suite
+current_results_models = None  # model version that scored current_results (see PredictionJob.models)
+PRIORITY_FORMULA = "fail_per_second"  # see predictor.ranking.PRIORITY_FORMULAS
+current_budget = None  # bench time budget in seconds for the ordered results (None: run everything)
+SIMILARITY_BACKEND = "auto"  # "exact", "lsh" (approximate) or "auto" (lsh for large corpora)
+PREDICTION_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".test_case_predictor_cache.pkl")
+JOB_POLL_MS = 50  # how often the Tk thread collects results from a running PredictionJob
+order_job = None
 
 def resource_path(relative_path):
     if hasattr(sys, '_MEIPASS'):
@@ -19,21 +29,11 @@ def resource_path(relative_path):
     return os.path.join(os.path.abspath("."), relative_path)
 
 
-# Load pre-trained ML models and preprocessors
-with open(resource_path("clf.pkl"), "rb") as f:
-    clf = pickle.load(f)
-with open(resource_path("reg.pkl"), "rb") as f:
-    reg = pickle.load(f)
-with open(resource_path("tfidf.pkl"), "rb") as f:
-    tfidf = pickle.load(f)
-with open(resource_path("scaler.pkl"), "rb") as f:
-    scaler = pickle.load(f)
-with open(resource_path("X_features.pkl"), "rb") as f:
-    X_features = pickle.load(f)
-with open(resource_path("test_ids.pkl"), "rb") as f:
-    test_ids = pickle.load(f)
-with open(resource_path("similar_case_details.pkl"), "rb") as f:
-    similar_case_details = pickle.load(f)
+# Pre-trained ML models and preprocessors, loaded in the background once the window is up
+models = ModelHandle(resource_path("."), similarity_backend=SIMILARITY_BACKEND)
+
+# Re-run suites and re-opened result pages reuse earlier predictions (kept between sessions)
+prediction_cache = PredictionCache(path=PREDICTION_CACHE_FILE)
 
 
 # Modern Color Palette - Soft Pastels
@@ -65,6 +65,7 @@ class ModernButton(tk.Frame):
         self.bg_color = bg_color
         self.hover_color = hover_color
         self.text_color = text_color
+        self.enabled = True
         
         # Create button frame with rounded appearance
         self.button_frame = tk.Frame(self, bg=bg_color, relief='flat', bd=0)
@@ -92,8 +93,15 @@ class ModernButton(tk.Frame):
             widget.bind('<Leave>', self.on_leave)
     
     def on_click(self, event):
-        if self.command:
+        if self.command and self.enabled:
             self.command()
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        self.label.config(
+            fg=self.text_color if enabled else COLORS['text_muted'],
+            cursor='hand2' if enabled else 'watch'
+        )
     
     def on_enter(self, event):
         self.button_frame.config(bg=self.hover_color)
@@ -207,6 +215,179 @@ class ExpandableText(tk.Frame):
             self.toggle_btn.config(text="show less" if self.is_expanded else "show more")
 
 
+class VirtualTable(tk.Frame):
+    """
+    Scrollable table of ordered results that only creates widgets for the visible rows.
+    A small pool of row frames is re-filled as the view scrolls, so thousands of results
+    cost no more than one screenful; set_items() re-sorts by re-filling the same rows.
+    """
+    ROW_HEIGHT = 84          # fixed, so any row's position is just index * ROW_HEIGHT
+    MAX_STEP_LINES = 3       # steps beyond this are summarized as "+n more"
+    STEPS_FONT = ('Inter', 11)
+    COLUMNS = [("Order", 80), ("TCID", 180), ("Steps", 400), ("Duration", 100), ("Pass Rate", 100)]
+
+    def __init__(self, parent, on_open=None, **kwargs):
+        super().__init__(parent, bg=COLORS['bg_card'], **kwargs)
+        self.on_open = on_open
+        self.items = []
+        self.top = 0  # scroll offset in pixels
+        self.pool = []
+        # Each step is one line, elided to the column width, so a row never outgrows ROW_HEIGHT
+        self.steps_font = tkfont.Font(root=self, font=self.STEPS_FONT)
+        fitting = (self.ROW_HEIGHT - 2) // self.steps_font.metrics('linespace')
+        self.step_lines = max(1, min(self.MAX_STEP_LINES, fitting))
+        self.steps_width = 300
+        self.elided = {}  # (text, width) -> elided text; measuring is a Tk round trip per call
+
+        # Header
+        header = tk.Frame(self, bg=COLORS['bg_card'])
+        header.pack(fill='x', padx=(2, 18), pady=(10, 4))
+        self._configure_columns(header)
+        for column, (text, _) in enumerate(self.COLUMNS):
+            tk.Label(
+                header,
+                text=text,
+                font=('Inter', 12, 'bold'),
+                bg=COLORS['bg_card'],
+                fg=COLORS['text_secondary'],
+                anchor='w',
+                padx=10,
+                pady=8
+            ).grid(row=0, column=column, sticky='ew')
+
+        body = tk.Frame(self, bg=COLORS['bg_card'])
+        body.pack(fill='both', expand=True)
+        self.scrollbar = tk.Scrollbar(body, orient='vertical', command=self.yview)
+        self.scrollbar.pack(side='right', fill='y')
+        self.viewport = tk.Frame(body, bg=COLORS['bg_card'])
+        self.viewport.pack(side='left', fill='both', expand=True)
+        self.viewport.bind('<Configure>', self._on_resize)
+
+        for widget in (self, self.viewport):
+            widget.bind('<MouseWheel>', lambda e: self.yview('scroll', int(-1 * (e.delta / 120)), 'units'))
+            widget.bind('<Button-4>', lambda e: self.yview('scroll', -1, 'units'))
+            widget.bind('<Button-5>', lambda e: self.yview('scroll', 1, 'units'))
+
+    def _configure_columns(self, frame):
+        for column, (_, minsize) in enumerate(self.COLUMNS):
+            frame.columnconfigure(column, minsize=minsize, weight=1 if column == 2 else 0)
+
+    def _make_row(self):
+        row = tk.Frame(self.viewport, bg=COLORS['bg_card'])
+        self._configure_columns(row)
+        row.order_label = tk.Label(row, font=('Inter', 14, 'bold'), fg=COLORS['order_page_btns'], padx=10)
+        row.tcid_label = tk.Label(
+            row, font=('Inter', 12, 'underline'), fg='#0000B3', cursor='hand2', padx=10, anchor='w'
+        )
+        row.steps_label = tk.Label(
+            row, font=self.STEPS_FONT, fg=COLORS['text_primary'], anchor='w', justify='left', padx=10
+        )
+        row.duration_label = tk.Label(row, font=('Inter', 11), fg=COLORS['text_primary'], padx=10)
+        row.passrate_label = tk.Label(row, font=('Inter', 11), fg=COLORS['text_primary'], padx=10)
+        labels = [row.order_label, row.tcid_label, row.steps_label, row.duration_label, row.passrate_label]
+        for column, label in enumerate(labels):
+            label.grid(row=0, column=column, sticky='nsew', padx=1)
+        row.rowconfigure(0, weight=1)
+        row.labels = labels
+        row.item = None
+        row.tcid_label.bind('<Button-1>', lambda e: self.on_open(row.item) if self.on_open and row.item else None)
+        for widget in [row] + labels:
+            widget.bind('<MouseWheel>', lambda e: self.yview('scroll', int(-1 * (e.delta / 120)), 'units'))
+            widget.bind('<Button-4>', lambda e: self.yview('scroll', -1, 'units'))
+            widget.bind('<Button-5>', lambda e: self.yview('scroll', 1, 'units'))
+        return row
+
+    def _fill_row(self, row, rank, item):
+        row.item = item
+        color = COLORS['bg_card'] if rank % 2 else COLORS['bg_secondary']
+        row.config(bg=color)
+        for label in row.labels:
+            label.config(bg=color)
+
+        steps = [re.sub(r'^\d+-', '', step).strip() for step in item.get('steps', [])]
+        lines = [f"{i}. {step}" for i, step in enumerate(steps[:self.step_lines], 1)]
+        more = f"  (+{len(steps) - self.step_lines} more)" if len(steps) > self.step_lines else ""
+        if more:
+            # Keep the summary visible: only the step text is elided
+            lines[-1] = self._elide(lines[-1], self.steps_width - self.steps_font.measure(more)) + more
+            lines[:-1] = [self._elide(line, self.steps_width) for line in lines[:-1]]
+        else:
+            lines = [self._elide(line, self.steps_width) for line in lines]
+        steps_text = "\n".join(lines)
+
+        row.order_label.config(text=str(rank))
+        row.tcid_label.config(text=f"{item.get('tcid', '—')} ↗")
+        row.steps_label.config(text=steps_text)
+        row.duration_label.config(
+            text=f"{item['predicted_duration']:.1f}" if 'predicted_duration' in item else "?"
+        )
+        row.passrate_label.config(text=f"{item.get('predicted_passrate', '?')}%")
+
+    def _on_resize(self, event):
+        # Enough pooled rows to cover the viewport plus the one partially scrolled in
+        needed = event.height // self.ROW_HEIGHT + 2
+        while len(self.pool) < needed:
+            self.pool.append(self._make_row())
+        fixed = sum(minsize for _, minsize in self.COLUMNS) - self.COLUMNS[2][1]
+        steps_width = max(250, event.width - fixed - 40)
+        if steps_width != self.steps_width:
+            self.steps_width = steps_width
+            self.elided.clear()
+        self.render()
+
+    def _elide(self, text, width):
+        """Cut text to fit width pixels on one line, ending it with "…" when shortened."""
+        key = (text, width)
+        if key not in self.elided:
+            if self.steps_font.measure(text) <= width:
+                self.elided[key] = text
+            else:
+                # Longest prefix that still fits together with the ellipsis
+                low, high = 0, len(text)
+                while low < high:
+                    mid = (low + high + 1) // 2
+                    if self.steps_font.measure(text[:mid].rstrip() + "…") <= width:
+                        low = mid
+                    else:
+                        high = mid - 1
+                self.elided[key] = text[:low].rstrip() + "…"
+        return self.elided[key]
+
+    def set_items(self, items):
+        """Show items in the given order, reusing the existing row widgets."""
+        self.items = items
+        self.render()
+
+    def yview(self, *args):
+        height = self.viewport.winfo_height()
+        total = len(self.items) * self.ROW_HEIGHT
+        if args[0] == 'moveto':
+            self.top = float(args[1]) * total
+        elif args[0] == 'scroll':
+            step = self.ROW_HEIGHT if args[2] == 'units' else height
+            self.top += int(args[1]) * step
+        self.top = max(0, min(self.top, total - height))
+        self.render()
+
+    def render(self):
+        height = max(1, self.viewport.winfo_height())
+        total = len(self.items) * self.ROW_HEIGHT
+        self.top = max(0, min(self.top, total - height))
+        first = int(self.top // self.ROW_HEIGHT)
+        offset = int(self.top % self.ROW_HEIGHT)
+        for slot, row in enumerate(self.pool):
+            index = first + slot
+            if index < len(self.items):
+                self._fill_row(row, index + 1, self.items[index])
+                row.place(x=0, y=slot * self.ROW_HEIGHT - offset, relwidth=1, height=self.ROW_HEIGHT - 2)
+            else:
+                row.place_forget()
+        if total > height:
+            self.scrollbar.set(self.top / total, (self.top + height) / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+
 
 # Create main window with modern styling
 root = tk.Tk()
@@ -228,7 +409,38 @@ def create_gradient_frame(parent, color1, color2, height=4):
         line.pack(fill='x')
     return gradient_frame
 
-def show_result_page(test_input, parent=root, on_return=None):
+def watch_model_state(button, status_label):
+    """Keep a predict button and its status label in sync with the background model loader"""
+    if not button.winfo_exists():
+        return
+    if models.ready:
+        button.set_enabled(True)
+        status_label.config(text="", fg=COLORS['text_secondary'])
+    elif models.state == "failed":
+        button.set_enabled(False)
+        status_label.config(text=f"Could not load models: {models.error}", fg='#ef4444')
+    else:
+        button.set_enabled(False)
+        status_label.config(
+            text=f"Loading models... ({models.loaded_count}/{len(ARTIFACTS)})",
+            fg=COLORS['text_secondary']
+        )
+        root.after(200, watch_model_state, button, status_label)
+
+def poll_job(job, owner, on_chunk, on_finish):
+    """Hand a PredictionJob's results to the Tk thread; the job is cancelled once owner is gone"""
+    if not owner.winfo_exists():
+        job.cancel()
+        return
+    for event in job.poll():
+        if event[0] == "chunk":
+            on_chunk(event[1], event[2])
+        else:
+            on_finish(event[0], event[1])
+            return
+    root.after(JOB_POLL_MS, poll_job, job, owner, on_chunk, on_finish)
+
+def show_result_page(test_input, parent=root, on_return=None, results=None, model_version=None):
 
     for widget in parent.winfo_children():
         widget.destroy()
@@ -239,8 +451,11 @@ def show_result_page(test_input, parent=root, on_return=None):
     if on_return is None:
             on_return = show_main_screen
 
-    # ML Prediction Results
-    results = parse_and_predict(test_input)
+    # ML Prediction Results (details come from the same model version as the prediction)
+    if results is None:
+        model_version = models.snapshot()
+        results = parse_and_predict(model_version, test_input, cache=prediction_cache)
+    model_version = model_version or models.snapshot()
     if not results:
         print("Prediction failed.")
         return
@@ -444,7 +659,7 @@ def show_result_page(test_input, parent=root, on_return=None):
     
     # Similar cases list
     for i, case_id in enumerate(results["similar_cases"]):
-        detail = similar_case_details.get(case_id, {})
+        detail = model_version.similar_case_details.get(case_id, {})
         steps = detail.get("steps", "N/A")
         duration = detail.get("duration", "N/A")
         result = detail.get("result", "N/A")
@@ -486,80 +701,43 @@ def show_result_page(test_input, parent=root, on_return=None):
 
 
 
-def validate_detailed_test_case(line: str) -> bool:
-    try:
-        parts = [p.strip() for p in line.strip().split(",", 2)]
-        if len(parts) != 3:
-            return False
-        tcid, num_steps_str, step_desc = parts
-        if not tcid or not num_steps_str.isdigit():
-            return False
-        num_steps = int(num_steps_str)
-        found_steps = re.findall(r'\b\d+-', step_desc)
-        if len(found_steps) != num_steps:
-            return False
-        return True
-    except:
-        return False
-
-
-
 def on_predict():
+    if not models.ready or not predict_btn.enabled:
+        return
     test_input = input_text.get("1.0", tk.END).strip()
     if not test_input:
         result_label.config(text="Please enter a test case first.", fg=COLORS['text_secondary'])
         return
-    if validate_detailed_test_case(test_input):
-        for widget in root.winfo_children():
-            widget.destroy()
-        show_result_page(test_input)
-    else:
+    if not validate_detailed_test_case(test_input):
         result_label.config(text="Invalid format! Please check your input.", fg='#ef4444')
+        return
 
+    # Score on a worker thread so the window stays responsive
+    predict_btn.set_enabled(False)
+    result_label.config(text="Analyzing...", fg=COLORS['text_secondary'])
+    job = PredictionJob(models, [test_input], cache=prediction_cache).start()
+    preds = []
 
+    def on_finish(status, detail):
+        predict_btn.set_enabled(True)
+        if status == "done" and preds[0]:
+            show_result_page(test_input, results=preds[0], model_version=job.models)
+        else:
+            print("Prediction failed:", detail)
+            result_label.config(text="Prediction failed.", fg='#ef4444')
 
-def on_order_multiple():
-    OrderWindow(root)
+    poll_job(job, result_label, lambda start, chunk: preds.extend(chunk), on_finish)
 
 
 
+def on_order_multiple():
+    OrderWindow(root)
 
-def parse_and_predict(test_input):
-    try:
-        parts = test_input.strip().split(",", 2)
-        if len(parts) != 3:
-            return None
-        tcid = parts[0].strip()
-        num_steps_str = parts[1].strip()
-        steps_raw = parts[2].strip()
-        if not tcid or not num_steps_str.isdigit():
-            return None
-        num_steps = int(num_steps_str)
-        found_steps = re.findall(r'\b\d+-', steps_raw)
-        if len(found_steps) != num_steps:
-            return None
-        step_keywords = re.sub(r'\b\d+-', '', steps_raw).strip()
-        X_keywords = tfidf.transform([step_keywords]).toarray()
-        X_steps = scaler.transform([[num_steps]])
-        X_input = np.hstack([X_keywords, X_steps])
-        pred_duration = reg.predict(X_input)[0]
-        pred_passrate = clf.predict_proba(X_input)[0][1] * 100
-        sims = cosine_similarity(X_input, X_features)[0]
-        top_indices = sims.argsort()[-4:-1][::-1]
-        similar_cases = [test_ids[i] for i in top_indices]
-        return {
-            "predicted_duration": round(pred_duration, 2),
-            "predicted_passrate": round(pred_passrate, 1),
-            "similar_cases": similar_cases
-        }
-    except Exception as e:
-        print("Error in parse_and_predict:", e)
-        return None
 
 
 
 def run_main_screen():
-    global input_text, result_label
+    global input_text, result_label, predict_btn
     
     # Main container with better spacing
     main_container = tk.Frame(root, bg=COLORS['bg_primary'])
@@ -658,12 +836,14 @@ def run_main_screen():
         font=('Inter', 11)
     )
     result_label.pack(pady=10)
+    watch_model_state(predict_btn, result_label)
 
 
 
 #------------------------------------------------------------------------------------------------
 def show_order_page():
-    global order_input_text, order_result_label  
+    global order_input_text, order_result_label, order_btn
+    global order_progress_frame, order_progress, order_progress_label, order_preview
 
     for widget in root.winfo_children():
         widget.destroy()
@@ -758,77 +938,127 @@ def show_order_page():
         wraplength = 500
     )
     order_result_label.pack(pady=10)
+    watch_model_state(order_btn, order_result_label)
+
+    # Progress of a running Order Now (shown while the worker thread scores the lines)
+    order_progress_frame = tk.Frame(result_frame, bg=COLORS['bg_primary'])
+
+    progress_row = tk.Frame(order_progress_frame, bg=COLORS['bg_primary'])
+    progress_row.pack(fill='x')
+    order_progress = ttk.Progressbar(progress_row, mode='determinate', length=400)
+    order_progress.pack(side='left', padx=(0, 15))
+    order_progress_label = tk.Label(
+        progress_row,
+        text="",
+        font=('Inter', 10),
+        bg=COLORS['bg_primary'],
+        fg=COLORS['text_secondary']
+    )
+    order_progress_label.pack(side='left')
+    ModernButton(
+        progress_row,
+        text="Cancel",
+        command=lambda: order_job.cancel() if order_job else None,
+        bg_color=COLORS['order_page_hover'],
+        hover_color=COLORS['order_page_btns'],
+        font=('Inter', 10),
+        padding=(16, 6)
+    ).pack(side='right')
+
+    # Rows fill in here as their predictions arrive
+    order_preview = tk.Listbox(
+        order_progress_frame,
+        height=8,
+        font=('Inter', 10),
+        bg=COLORS['bg_card'],
+        fg=COLORS['text_primary'],
+        relief='flat',
+        highlightthickness=0
+    )
+    order_preview.pack(fill='x', pady=(10, 0))
 
 
 
 def on_order_now():
-    global order_input_text, order_result_label
-    global current_sort_mode, current_results
+    global order_job
 
+    if not models.ready or not order_btn.enabled:
+        return
     input_raw = order_input_text.get("1.0", tk.END).strip()
     lines = [line.strip() for line in input_raw.split("\n") if line.strip()]
     
-    results = []
-    
-
+    # Validate every line before running the models
     for line in lines:
-        if validate_detailed_test_case(line):
-            parts = line.strip().split(",", 2)
-            if len(parts) != 3:
-                continue  
-
-            tcid = parts[0].strip()
-            steps = [s.strip() for s in parts[2].split(";") if s.strip()]
-
-            pred = parse_and_predict(line)
-            if pred:
-                pred["tcid"] = tcid
-                pred["steps"] = steps
-                pred["raw"] = line
-                results.append(pred)
-        else:
+        if not validate_detailed_test_case(line):
             order_result_label.config(text=f"Invalid format: {line}", fg="#ef4444")
             return
 
-    
-
-    if len(results) < 2:
+    if len(lines) < 2:
         order_result_label.config(text="Please enter at least 2 valid test cases.", fg="#ef4444")
         return
 
-    # Clear previous messages
+    # Clear previous messages and show the progress area
     order_result_label.config(text="", fg=COLORS['text_secondary'])
+    order_btn.set_enabled(False)
+    order_progress.config(maximum=len(lines), value=0)
+    order_progress_label.config(text=f"Scoring 0 / {len(lines)}")
+    order_preview.delete(0, tk.END)
+    order_progress_frame.pack(fill='x', pady=(0, 10))
+
+    # Score on a worker thread; rows come back chunk by chunk
+    order_job = job = PredictionJob(models, lines, cache=prediction_cache).start()
+    results = []
 
+    def on_chunk(start, preds):
+        for line, pred in zip(lines[start:start + len(preds)], preds):
+            if pred:
+                parts = line.strip().split(",", 2)
+                pred["tcid"] = parts[0].strip()
+                pred["steps"] = [s.strip() for s in parts[2].split(";") if s.strip()]
+                pred["raw"] = line
+                results.append(pred)
+                order_preview.insert(
+                    tk.END,
+                    f"{pred['tcid']}    {pred['predicted_duration']:.1f}s    {pred['predicted_passrate']}%"
+                )
+        order_preview.see(tk.END)
+        order_progress.config(value=start + len(preds))
+        order_progress_label.config(text=f"Scoring {start + len(preds)} / {len(lines)}")
+
+    def on_finish(status, detail):
+        global current_results, current_results_models, order_job
+        order_job = None
+        order_btn.set_enabled(True)
+        order_progress_frame.pack_forget()
+        if status == "error":
+            print("Error in predict_batch:", detail)
+            order_result_label.config(text="Prediction failed.", fg="#ef4444")
+        elif status == "cancelled":
+            order_result_label.config(
+                text=f"Cancelled after {detail} of {len(lines)} test cases.", fg=COLORS['text_secondary']
+            )
+        else:
+            current_results = ResultTable(results, priority=PRIORITY_FORMULA)
+            current_results_models = job.models
+            # Display results below input box
+            display_ordered_results(current_results)
 
-    current_results = results
+    poll_job(order_job, order_progress_frame, on_chunk, on_finish)
 
 
-    # Display results below input box
-    display_ordered_results(results)
+def format_runtime(seconds):
+    seconds = int(round(seconds))
+    if seconds >= 3600:
+        return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds}s"
 
 
 def display_ordered_results(results):
     for widget in root.winfo_children():
         widget.destroy()
 
-        global current_sort_mode
-
-    # Compute priority scores if not already present
-    for test in results:
-        if 'priority_score' not in test:
-            test['priority_score'] = (1 - test['predicted_passrate']) / test['predicted_duration']
-
-    # Sort based on current sort mode
-    if current_sort_mode == 0:
-        results.sort(key=lambda x: x['priority_score'], reverse=True)
-    elif current_sort_mode == 1:
-        results.sort(key=lambda x: x['predicted_duration'])
-    elif current_sort_mode == 2:
-        results.sort(key=lambda x: x['predicted_passrate'])
-    elif current_sort_mode == 3:
-        results.sort(key=lambda x: x['tcid'])
-
-
     root.configure(bg=COLORS['bg_primary'])
     # Main container
     main_container = tk.Frame(root, bg=COLORS['bg_primary'])
@@ -860,6 +1090,69 @@ def display_ordered_results(results):
     sort_container = tk.Frame(main_container, bg=COLORS['bg_primary'])
     sort_container.pack(fill='x', pady=(0, 10), padx=(0, 10))
 
+    # Time budget: keep only the cases that find the most failures within it
+    tk.Label(
+        sort_container,
+        text="Budget (min):",
+        font=('Inter', 10),
+        bg=COLORS['bg_primary'],
+        fg=COLORS['text_secondary']
+    ).pack(side='left', padx=(10, 8))
+
+    budget_var = tk.StringVar(value="" if current_budget is None else f"{current_budget / 60:g}")
+    budget_entry = tk.Entry(
+        sort_container,
+        textvariable=budget_var,
+        width=8,
+        font=('Inter', 10),
+        bg=COLORS['bg_card'],
+        fg=COLORS['text_primary'],
+        relief='flat',
+        bd=0,
+        highlightthickness=1,
+        highlightbackground=COLORS['border'],
+        highlightcolor=COLORS['accent_light'],
+        insertbackground=COLORS['text_primary']
+    )
+    budget_entry.pack(side='left', padx=(0, 8), ipady=6)
+
+    def on_schedule(event=None):
+        global current_budget
+        text = budget_var.get().strip()
+        if not text:
+            current_budget = None
+        else:
+            try:
+                minutes = float(text)
+            except ValueError:
+                minutes = -1
+            if minutes <= 0:
+                runtime_label.config(text="Budget must be a positive number of minutes.", fg="#ef4444")
+                return
+            current_budget = minutes * 60
+        show_rows()
+
+    schedule_btn = ModernButton(
+        sort_container,
+        text="Schedule",
+        command=on_schedule,
+        bg_color=COLORS['accent_light'],
+        hover_color=COLORS['accent_soft'],
+        font=('Inter', 10),
+        padding=(12, 6)
+    )
+    schedule_btn.pack(side='left')
+    budget_entry.bind('<Return>', on_schedule)
+
+    runtime_label = tk.Label(
+        sort_container,
+        text="",
+        font=('Inter', 10),
+        bg=COLORS['bg_primary'],
+        fg=COLORS['text_secondary']
+    )
+    runtime_label.pack(side='left', padx=(12, 0))
+
     tk.Label(sort_container, text="", bg=COLORS['bg_primary']).pack(side='left', expand=True)
 
     # "Sort by" label with modern styling
@@ -914,13 +1207,12 @@ def display_ordered_results(results):
     )
 
     # Dropdown menu with modern styling
-    sort_labels = ["Priority", "Duration", "Pass Rate", "TCID"]
-    sort_var = tk.StringVar(value=sort_labels[current_sort_mode])
+    sort_var = tk.StringVar(value=SORT_KEYS[current_sort_mode])
 
     sort_dropdown = ttk.Combobox(
         dropdown_frame,
         textvariable=sort_var,
-        values=["Priority", "Duration", "Pass Rate", "TCID"],
+        values=SORT_KEYS,
         state="readonly",
         width=12,
         style="Modern.TCombobox"
@@ -933,19 +1225,22 @@ def display_ordered_results(results):
         global current_sort_mode
 
         selection = sort_var.get()
-        if selection == "Priority":
-            current_sort_mode = 0
-        elif selection == "Duration":
-            current_sort_mode = 1
-        elif selection == "Pass Rate":
-            current_sort_mode = 2
-        elif selection == "TCID":
-            current_sort_mode = 3
-        else:
-            current_sort_mode = 0  # fallback
-
-        # Re-run ordering logic
-        display_ordered_results(current_results)
+        current_sort_mode = SORT_KEYS.index(selection) if selection in SORT_KEYS else 0
+        show_rows()
+
+    def show_rows():
+        # Each order is argsorted once per suite; the table only refills its visible rows
+        results_table.top = 0
+        results_table.set_items(results.sorted(SORT_KEYS[current_sort_mode], current_budget))
+
+        plan = results.plan(current_budget)
+        text = f"Projected runtime: {format_runtime(plan['runtime'])}"
+        if current_budget is not None:
+            text += (
+                f" of {format_runtime(current_budget)} · {len(plan['order'])} of {len(results)} cases"
+                f" · {plan['expected_failures']:.1f} expected failures"
+            )
+        runtime_label.config(text=text, fg=COLORS['text_secondary'])
 
     # Bind combobox selection change to callback
     sort_dropdown.bind("<<ComboboxSelected>>", on_sort_changed)
@@ -964,237 +1259,26 @@ def display_ordered_results(results):
 # --- SORT BY DROPDOWN -----------------------------------------------------------------
 
 
-    # Scrollable card - center it
+    # Results table: only the visible rows get widgets, and they are reused while scrolling
     results_card = ModernCard(main_container)
     results_card.pack(fill='both', expand=True)
-    
-    # Create outer frame for centering
-    outer_frame = tk.Frame(results_card, bg=COLORS['bg_card'])
-    outer_frame.pack(fill='both', expand=True)
-    
-    canvas = tk.Canvas(outer_frame, bg=COLORS['bg_card'], highlightthickness=0)
-    scrollbar = tk.Scrollbar(outer_frame, orient='vertical', command=canvas.yview)
-    scrollable_frame = tk.Frame(canvas, bg=COLORS['bg_card'])
-    scrollable_frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
-    canvas.create_window((0, 0), window=scrollable_frame, anchor='n')
-    canvas.configure(yscrollcommand=scrollbar.set)
-    canvas.pack(side='left', fill='both', expand=True)
-    scrollbar.pack(side='right', fill='y')
-
-    # Center the table horizontally
-    center_container = tk.Frame(scrollable_frame, bg=COLORS['bg_card'])
-    center_container.pack(expand=True)
-    
-    # Main table container
-    table_container = tk.Frame(center_container, bg=COLORS['bg_card'])
-    table_container.pack(pady=30)
-    
-    # Configure main table grid weights for responsive behavior
-    headers = ["Order", "TCID", "Steps", "Duration", "Pass Rate"]
-    column_weights = [0, 0, 1, 0, 0]  # Steps column gets all extra space
-    
-    for i, weight in enumerate(column_weights):
-        table_container.columnconfigure(i, weight=weight, minsize=60)
-    
-    # Row colors for striping
-    row_colors = [COLORS['bg_card'], COLORS.get('bg_secondary', '#f8f9fa')]
-    
-    # Store row frames for consistent height
-    row_frames = []
-    
-    # === HEADERS ===
-    header_frame = tk.Frame(table_container, bg=COLORS['bg_card'])
-    header_frame.grid(row=0, column=0, columnspan=5, sticky='ew', padx=2, pady=1)
-    
-    for i, text in enumerate(headers):
-        if i == 0:
-            table_container.columnconfigure(i, minsize=80)
-        elif i == 1:
-            table_container.columnconfigure(i, minsize=120)
-        elif i == 2:
-            table_container.columnconfigure(i, minsize=400, weight=1)
-        elif i == 3:
-            table_container.columnconfigure(i, minsize=100)
-        elif i == 4:
-            table_container.columnconfigure(i, minsize=100)
-            
-        for i, text in enumerate(headers):
-            if text == "Steps": # padding tuning just for title 'steps'
-                custom_padx = 85
-            elif text == "TCID": # padding tuning just for title 'TCID'
-                custom_padx = 20
-            else:
-                custom_padx = 1
-
-            header_label = tk.Label(
-                header_frame,
-                text=text,
-                font=('Inter', 12, 'bold'),
-                bg=COLORS['bg_card'],
-                fg=COLORS['text_secondary'],
-                anchor='w',
-                padx=10,
-                pady=8
-            )
-            header_label.grid(row=0, column=i, sticky='ew', padx=custom_padx)
-
-    
-    # Configure header frame columns
-    for i in range(5):
-        header_frame.columnconfigure(i, weight=column_weights[i])
-    
-    # === DATA ROWS ===
-    for idx, item in enumerate(results, start=1):
-        row_color = row_colors[idx % 2]
-        
-        # Create a frame for the entire row
-        row_frame = tk.Frame(table_container, bg=row_color)
-        row_frame.grid(row=idx, column=0, columnspan=5, sticky='ew', padx=2, pady=1)
-        row_frames.append(row_frame)
-        
-        # Configure row frame columns to match table
-        for i in range(5):
-            row_frame.columnconfigure(i, weight=column_weights[i])
-            if i == 0:
-                row_frame.columnconfigure(i, minsize=80)
-            elif i == 1:
-                row_frame.columnconfigure(i, minsize=120)
-            elif i == 2:
-                row_frame.columnconfigure(i, minsize=400, weight=1)
-            elif i == 3:
-                row_frame.columnconfigure(i, minsize=100)
-            elif i == 4:
-                row_frame.columnconfigure(i, minsize=100)
-        
-        # === ORDER ===
-        tk.Label(
-            row_frame,
-            text=str(idx),
-            font=('Inter', 14, 'bold'),
-            bg=row_color,
-            fg=COLORS['order_page_btns'],
-            anchor='center',
-            padx=10,
-            pady=8
-        ).grid(row=0, column=0, sticky='ew', padx=1)
-        
-        # === TCID ===
-        make_tcid_clickable(
-            row_frame,
-            item.get('tcid', '—'),
-            item.get('raw', ''),
-            on_return=lambda: display_ordered_results(current_results)
-        )
 
-
-        
-        # === STEPS ===
-        steps_text = ""
-        for i, step in enumerate(item.get('steps', []), 1):
-            clean_step = re.sub(r'^\d+-', '', step).strip()
-            steps_text += f"{i}. {clean_step}\n"
-        steps_text = steps_text.rstrip()
-        
-        steps_label = tk.Label(
-            row_frame,
-            text=steps_text,
-            font=('Inter', 11),
-            bg=row_color,
-            fg=COLORS['text_primary'],
-            anchor='nw',
-            justify='left',
-            wraplength=300,  # Will adjust based on available space
-            padx=10,
-            pady=8
+    results_table = VirtualTable(
+        results_card,
+        # A row already holds its prediction; details come from the version that scored it
+        on_open=lambda item: show_result_page(
+            item.get('raw', ''), on_return=lambda: display_ordered_results(current_results),
+            results=item, model_version=current_results_models
         )
-        steps_label.grid(row=0, column=2, sticky='ew', padx=1)
-        
-        # === DURATION ===
-        tk.Label(
-            row_frame,
-            text=f"{item['predicted_duration']:.1f}" if 'predicted_duration' in item else "?",
-            font=('Inter', 11),
-            bg=row_color,
-            fg=COLORS['text_primary'],
-            anchor='center',
-            padx=10,
-            pady=8
-        ).grid(row=0, column=3, sticky='ew', padx=1)
-        
-        # === PASS RATE ===
-        tk.Label(
-            row_frame,
-            text=f"{item.get('predicted_passrate', '?')}%",
-            font=('Inter', 11),
-            bg=row_color,
-            fg=COLORS['text_primary'],
-            anchor='center',
-            padx=10,
-            pady=8
-        ).grid(row=0, column=4, sticky='ew', padx=1)
-    
-    # Function to update wraplength and ensure consistent row heights
-    def update_layout(event=None):
-        # Get the current width of the table container
-        table_container.update_idletasks()
-        try:
-            table_width = table_container.winfo_width()
-            if table_width > 100:  # Ensure we have a reasonable width
-                # Calculate available width for steps column
-                available_width = max(250, int(table_width * 0.4))
-                
-                # Update wraplength for all steps labels and sync row heights
-                for idx, row_frame in enumerate(row_frames):
-                    steps_widget = None
-                    for widget in row_frame.winfo_children():
-                        if isinstance(widget, tk.Label) and widget.grid_info()['column'] == 2:
-                            widget.configure(wraplength=available_width)
-                            steps_widget = widget
-                            break
-                    
-                    # Update row frame after wraplength change
-                    if steps_widget:
-                        row_frame.update_idletasks()
-                        
-        except:
-            pass  # In case of any errors, just skip the update
-    
-    # Function to center the canvas content
-    def center_canvas(event=None):
-        canvas.update_idletasks()
-        canvas_width = canvas.winfo_width()
-        content_width = scrollable_frame.winfo_reqwidth()
-        
-        if content_width < canvas_width:
-            # Center the content
-            x_offset = (canvas_width - content_width) // 2
-            canvas.create_window((x_offset, 0), window=scrollable_frame, anchor='n')
-        else:
-            # Content is wider than canvas, align to left
-            canvas.create_window((0, 0), window=scrollable_frame, anchor='n')
-    
-    # Bind the update functions
-    canvas.bind('<Configure>', center_canvas)
-    root.after(100, update_layout)
-
-    
-    # Initial updates
-    root.after(100, update_layout)
-    root.after(150, center_canvas)
-    
-
-    tk.Frame(scrollable_frame, height=20, bg=COLORS['bg_card']).pack(fill='x')
-
-    def on_mousewheel(event):
-        canvas.yview_scroll(int(-1*(event.delta/120)), "units")
-
-    canvas.bind_all("<MouseWheel>", on_mousewheel)
-    canvas.focus_set()
+    )
+    results_table.pack(fill='both', expand=True, padx=20, pady=(10, 20))
+    show_rows()
+    results_table.focus_set()
 
 
     # === EXPORT SECTION ===
-    export_container = ModernCard(scrollable_frame)
-    export_container.pack(pady=30)
+    export_container = ModernCard(main_container)
+    export_container.pack(pady=(20, 0))
 
     export_inner = tk.Frame(export_container, bg=COLORS['bg_card'])
     export_inner.pack(padx=30, pady=20)
@@ -1226,7 +1310,9 @@ def display_ordered_results(results):
     export_btn = ModernButton(
         export_inner,
         text="Export",
-        command=lambda: export_results(results, export_var.get().upper()),
+        command=lambda: export_results(
+            results.sorted(SORT_KEYS[current_sort_mode], current_budget), export_var.get().upper()
+        ),
         bg_color=COLORS['accent_light'],
         hover_color=COLORS['accent_soft'],
         font=('Inter', 10),
@@ -1257,35 +1343,12 @@ def open_result_popup(test_input):
     show_result_page(test_input, parent=popup)
 
 
-def make_tcid_clickable(parent, tcid, raw_data, on_return):
-    def open_result():
-        show_result_page(raw_data, on_return=on_return)
-
-    label = tk.Label(
-        parent,
-        text=f"{tcid} ↗",
-        font=('Inter', 12, 'underline'),
-        bg=parent['bg'],
-        fg='#0000B3',
-        cursor='hand2',
-        padx=10,
-        pady=8,
-        anchor='w'
-    )
-    label.grid(row=0, column=1, sticky='ew', padx=1)
-    label.bind("<Button-1>", lambda e: open_result())
-
-
 def export_results(results, format):
 
     # --- Determine sort label ---
-    sort_labels = {
-        0: "Priority",
-        1: "Duration",
-        2: "Pass Rate",
-        3: "TCID"
-    }
-    sorted_by = sort_labels.get(current_sort_mode, "Unknown")
+    sorted_by = SORT_KEYS[current_sort_mode]
+    if current_budget is not None:
+        sorted_by += f" within a {format_runtime(current_budget)} budget"
 
     # --- Create default filename ---
     today = datetime.now().strftime('%Y-%m-%d_%H-%M')
@@ -1353,5 +1416,13 @@ def export_results(results, format):
 
 # Initialize the application
 run_main_screen()
+root.after(100, models.load_in_background)
+models.watch()  # pick up retrained models without restarting the app
 root.mainloop()
 
+try:
+    prediction_cache.save()
+    print("Prediction cache:", prediction_cache.stats)
+except OSError as e:
+    print("Could not save the prediction cache:", e)
+
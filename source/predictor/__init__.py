@@ -0,0 +1 @@
+"""Inference helpers for the AI Test Case Predictor."""
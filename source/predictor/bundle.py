@@ -0,0 +1,151 @@
+"""
+Pickle-free model bundle: every numeric array is a plain .npy file that can be
+opened with mmap_mode="r", described by a small manifest.json.
+
+    bundle/
+        manifest.json
+        tfidf.idf.npy, tfidf.terms.npy, scaler.scale.npy, ..., reg.nodes.npy, ...
+        similar_case_details.json
+
+Each artifact records the class that thaws it, so a bundle can hold either the
+frozen notebook models or the incrementally trained ones (predictor.online).
+A bundle exported next to the .pkl files also records their sha1 ("sources"), so
+ModelRegistry can tell pickles retrained since from a mere change of mtime.
+
+Running apps memory-map a live bundle's arrays, and rewriting a mapped file in
+place (np.save truncates it first) kills them with SIGBUS. A live bundle may
+therefore only be replaced by swapping the directory: use publish_bundle, never
+export_bundle (or a copy) over an existing bundle/.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+
+import numpy as np
+
+from predictor.forest import FrozenForest
+from predictor.linear import FrozenLinearRegressor, FrozenLogistic, FrozenScaler
+from predictor.similarity import SimilarityIndex
+from predictor.vectorizer import FrozenTfidf, HashedTfidf
+
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+
+# Bundle artifact name -> class that freezes the fitted sklearn model (and thaws
+# artifacts of bundles written before the manifest recorded a "type")
+ARTIFACT_TYPES = {
+    "tfidf": FrozenTfidf,
+    "scaler": FrozenScaler,
+    "clf": FrozenLogistic,
+    "reg": FrozenForest,
+    "similarity_index": SimilarityIndex,
+}
+
+# Every class a manifest "type" may name
+FROZEN_TYPES = {
+    cls.__name__: cls
+    for cls in (
+        FrozenTfidf, HashedTfidf, FrozenScaler, FrozenLogistic, FrozenLinearRegressor, FrozenForest, SimilarityIndex
+    )
+}
+
+
+def file_digest(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def export_bundle(out_dir, tfidf, scaler, clf, reg, similarity_index, similar_case_details=None, sources=None):
+    """
+    Write fitted sklearn models (or already frozen ones) to out_dir as .npy files + manifest.
+    sources ({filename: file_digest}) names the pickled models the bundle was made from.
+    Writes the files in place: only for a new directory (see publish_bundle).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    models = {"tfidf": tfidf, "scaler": scaler, "clf": clf, "reg": reg, "similarity_index": similarity_index}
+    manifest = {"format_version": FORMAT_VERSION, "created": datetime.now().isoformat(timespec="seconds"), "artifacts": {}}
+
+    for name, model in models.items():
+        if type(model).__name__ not in FROZEN_TYPES:
+            model = ARTIFACT_TYPES[name].from_sklearn(model)
+        arrays, meta = model.to_bundle()
+        files = {}
+        for key, array in arrays.items():
+            filename = f"{name}.{key}.npy"
+            np.save(os.path.join(out_dir, filename), np.ascontiguousarray(array), allow_pickle=False)
+            files[key] = {"file": filename, "dtype": str(array.dtype), "shape": list(array.shape)}
+        manifest["artifacts"][name] = {"type": type(model).__name__, "arrays": files, "meta": meta}
+
+    if similar_case_details is not None:
+        with open(os.path.join(out_dir, "similar_case_details.json"), "w", encoding="utf-8") as f:
+            json.dump(similar_case_details, f, ensure_ascii=False)
+        manifest["similar_case_details"] = "similar_case_details.json"
+    if sources:
+        manifest["sources"] = dict(sources)
+
+    # The manifest goes last so a half-written bundle is never picked up
+    with open(os.path.join(out_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def publish_bundle(out_dir, **models):
+    """
+    export_bundle into a fresh sibling directory, then swap it in for out_dir, so that
+    files a running app has memory-mapped are never overwritten in place.
+    """
+    out_dir = os.path.abspath(out_dir)
+    staging = tempfile.mkdtemp(dir=os.path.dirname(out_dir), prefix=".bundle-")
+    try:
+        manifest = export_bundle(staging, **models)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    if os.path.exists(out_dir):
+        retired = staging + ".old"
+        os.rename(out_dir, retired)
+        os.rename(staging, out_dir)
+        shutil.rmtree(retired, ignore_errors=True)
+    else:
+        os.rename(staging, out_dir)
+    return manifest
+
+
+class Bundle:
+    """Read side of export_bundle; arrays are memory-mapped, nothing is unpickled."""
+
+    def __init__(self, directory, mmap_mode="r"):
+        self.directory = directory
+        self.mmap_mode = mmap_mode
+        with open(os.path.join(directory, MANIFEST), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported bundle format: {self.manifest.get('format_version')}")
+
+    @staticmethod
+    def exists(directory):
+        return os.path.exists(os.path.join(directory, MANIFEST))
+
+    def __contains__(self, name):
+        if name == "similar_case_details":
+            return "similar_case_details" in self.manifest
+        return name in self.manifest["artifacts"]
+
+    def array(self, name, key):
+        entry = self.manifest["artifacts"][name]["arrays"][key]
+        return np.load(os.path.join(self.directory, entry["file"]), mmap_mode=self.mmap_mode, allow_pickle=False)
+
+    def load(self, name):
+        if name == "similar_case_details":
+            with open(os.path.join(self.directory, self.manifest["similar_case_details"]), encoding="utf-8") as f:
+                return json.load(f)
+        entry = self.manifest["artifacts"][name]
+        arrays = {key: self.array(name, key) for key in entry["arrays"]}
+        cls = FROZEN_TYPES[entry["type"]] if "type" in entry else ARTIFACT_TYPES[name]
+        return cls.from_bundle(arrays, entry["meta"])
@@ -0,0 +1,92 @@
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+# Similar-case results kept per entry, one per (TCID, k) it was asked for; the oldest go first
+MAX_SIMILAR_PER_ENTRY = 4
+
+
+class PredictionCache:
+    """
+    Bounded LRU of scored test cases for predict_batch(..., cache=...), keyed on the
+    model version and the normalized (num_steps, step_keywords). Each entry keeps the
+    feature row, so the similar cases of a case re-run under another TCID only need
+    the similarity search, and the ids found for its last few TCIDs (see add_similar).
+    With a path, entries survive between sessions (load/save).
+    """
+
+    def __init__(self, max_entries=10_000, path=None):
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(models, num_steps, step_keywords):
+        # Tokenization ignores how the steps were spaced, so neither does the key
+        return models.model_key, num_steps, " ".join(step_keywords.split())
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def add_similar(self, entry, key, similar):
+        """Store the similar cases found for key (TCID, k) in entry, dropping the oldest beyond the bound."""
+        with self._lock:
+            found = entry["similar"]
+            found[key] = similar
+            while len(found) > MAX_SIMILAR_PER_ENTRY:
+                del found[next(iter(found))]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    @property
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits, "misses": self.misses, "entries": len(self._entries),
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+    def load(self):
+        try:
+            with open(self.path, "rb") as f:
+                entries = pickle.load(f)
+        except Exception as e:
+            # A stale or truncated cache file is only a lost speed-up
+            print("Ignoring prediction cache:", e)
+            return
+        with self._lock:
+            self._entries = OrderedDict(entries[-self.max_entries:])
+
+    def save(self):
+        with self._lock:
+            entries = list(self._entries.items())
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(entries, f)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,207 @@
+"""
+Headless entry point (no Tk needed), e.g. for CI runners:
+
+    python -m predictor predict suite.txt -o predictions.jsonl
+    cat suite.txt | python -m predictor predict --format csv > predictions.csv
+    python -m predictor serve --port 8080
+    python -m predictor update new_cases.csv --bundle online/bundle   (incremental training, see predictor.online)
+    python -m predictor train history.csv          (full retraining, see predictor.train)
+
+Each input line is 'TCID, num_steps, 1-step; 2-step; ...'. Lines are read and
+scored in batches, so memory stays flat however long the input is.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from itertools import islice
+
+from predictor.ann import LSH_BITS, LSH_TABLES
+from predictor.cache import PredictionCache
+from predictor.engine import SIMILAR_CASES_K, parse_test_case, predict_batch
+from predictor.registry import ModelHandle, ModelRegistry
+
+# Directory holding the shipped model artifacts (the source/ folder)
+DEFAULT_MODELS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CSV_FIELDS = ["line", "tcid", "predicted_duration", "predicted_passrate", "similar_cases", "error"]
+
+
+def iter_batches(stream, batch_size):
+    """Yield lists of (line_number, text) for the non-blank lines of stream."""
+    numbered = ((n, line.strip()) for n, line in enumerate(stream, start=1))
+    numbered = ((n, line) for n, line in numbered if line)
+    while True:
+        batch = list(islice(numbered, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def iter_predictions(models, stream, batch_size=1000, k=SIMILAR_CASES_K, cache=None):
+    """Yield one output record per non-blank input line, in input order."""
+    for batch in iter_batches(stream, batch_size):
+        preds = predict_batch(models, [line for _, line in batch], k=k, cache=cache)
+        for (number, line), pred in zip(batch, preds):
+            parsed = parse_test_case(line)
+            record = {"line": number, "tcid": parsed[0] if parsed else line.split(",", 1)[0].strip()}
+            if pred is None:
+                record["error"] = "invalid format"
+            else:
+                record.update(pred)
+            yield record
+
+
+class JsonlWriter:
+    def __init__(self, out):
+        self.out = out
+
+    def write(self, record):
+        self.out.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class CsvWriter:
+    def __init__(self, out):
+        self.writer = csv.DictWriter(out, fieldnames=CSV_FIELDS)
+        self.writer.writeheader()
+
+    def write(self, record):
+        row = dict(record)
+        row["similar_cases"] = "|".join(row.get("similar_cases", []))
+        self.writer.writerow(row)
+
+
+WRITERS = {"jsonl": JsonlWriter, "csv": CsvWriter}
+
+
+def similarity_params(args):
+    """LSHIndex settings given on the command line (the rest keep predictor.ann's defaults)."""
+    params = {"n_tables": args.lsh_tables, "n_bits": args.lsh_bits, "n_probe_tables": args.lsh_probe}
+    return {name: value for name, value in params.items() if value is not None}
+
+
+def add_similarity_arguments(parser):
+    parser.add_argument("--similarity-backend", choices=["auto", "exact", "lsh"], default="auto")
+    parser.add_argument("--lsh-tables", type=int, help=f"LSH hash tables (default: {LSH_TABLES})")
+    parser.add_argument("--lsh-bits", type=int, help=f"bits per LSH table (default: {LSH_BITS})")
+    parser.add_argument("--lsh-probe", type=int, metavar="TABLES",
+                        help="LSH tables probed per query: fewer is faster, more finds more (default: all)")
+
+
+def run_predict(args):
+    models = ModelRegistry(args.models, args.similarity_backend, similarity_params(args))
+    cache = PredictionCache(args.cache_size, path=args.cache) if args.cache else None
+    infile = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    outfile = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    total = invalid = 0
+    try:
+        writer = WRITERS[args.format](outfile)
+        for record in iter_predictions(models, infile, args.batch_size, args.k, cache):
+            writer.write(record)
+            total += 1
+            invalid += "error" in record
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+        if outfile is not sys.stdout:
+            outfile.close()
+
+    print(f"Predicted {total - invalid} test cases ({invalid} invalid lines)", file=sys.stderr)
+    if cache is not None:
+        cache.save()
+        print(f"Prediction cache: {cache.stats}", file=sys.stderr)
+    return 1 if invalid else 0
+
+
+def run_serve(args):
+    from predictor.server import serve
+
+    models = ModelHandle(args.models, args.similarity_backend, similarity_params(args))
+    if args.watch:
+        models.watch(args.watch)
+    serve(
+        models, host=args.host, port=args.port, max_batch=args.max_batch,
+        max_wait=args.max_wait_ms / 1000, workers=args.workers, k=args.k,
+        cache=PredictionCache(args.cache_size) if args.cache_size else None
+    )
+    return 0
+
+
+def run_update(args):
+    from predictor.online import default_state_path, update
+
+    state = args.state or default_state_path(args.bundle)
+    try:
+        added, total = update(args.inputs, state, args.bundle, args.batch_size)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    print(f"Trained on {added} new test cases ({total} in total), bundle published to {args.bundle}", file=sys.stderr)
+    return 0
+
+
+def run_train(args):
+    from predictor.train import train
+
+    start = time.perf_counter()
+    rows = train(args.input, args.output, args.cache_dir, args.jobs)
+    print(f"Trained on {rows} test cases in {time.perf_counter() - start:.1f}s, artifacts written to {args.output}",
+          file=sys.stderr)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m predictor", description="AI Test Case Predictor")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    predict = commands.add_parser("predict", help="predict duration and pass rate for test cases")
+    predict.add_argument("input", nargs="?", default="-", help="input file, one test case per line ('-' for stdin)")
+    predict.add_argument("-o", "--output", default="-", help="output file ('-' for stdout)")
+    predict.add_argument("--format", choices=sorted(WRITERS), default="jsonl")
+    predict.add_argument("--models", default=DEFAULT_MODELS_DIR, help="directory with the model artifacts")
+    predict.add_argument("--batch-size", type=int, default=1000)
+    predict.add_argument("-k", type=int, default=SIMILAR_CASES_K, help="similar cases per prediction")
+    add_similarity_arguments(predict)
+    predict.add_argument("--cache", metavar="FILE",
+                         help="reuse predictions stored in FILE by earlier runs (created if missing)")
+    predict.add_argument("--cache-size", type=int, default=100_000, help="most test cases kept in the cache")
+    predict.set_defaults(func=run_predict)
+
+    serve = commands.add_parser("serve", help="run the local HTTP prediction service")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8080)
+    serve.add_argument("--models", default=DEFAULT_MODELS_DIR, help="directory with the model artifacts")
+    serve.add_argument("--max-batch", type=int, default=512, help="most lines scored in one micro-batch")
+    serve.add_argument("--max-wait-ms", type=float, default=5.0, help="how long a micro-batch waits to fill up")
+    serve.add_argument("--workers", type=int, default=1, help="threads running micro-batches")
+    serve.add_argument("-k", type=int, default=SIMILAR_CASES_K, help="similar cases per prediction")
+    add_similarity_arguments(serve)
+    serve.add_argument("--watch", type=float, default=5.0, metavar="SECONDS",
+                       help="poll the model artifacts and hot-swap retrained ones (0 disables)")
+    serve.add_argument("--cache-size", type=int, default=10_000,
+                       help="test cases kept in the prediction cache (0 disables)")
+    serve.set_defaults(func=run_serve)
+
+    update = commands.add_parser("update", help="train the online models on new parsed test cases and publish a bundle")
+    update.add_argument("inputs", nargs="+", help="parsed test case csv files or Parquet dataset directories")
+    update.add_argument("--bundle", required=True,
+                        help="bundle directory to publish to (a bundle of the notebook models is never replaced)")
+    update.add_argument("--state", help="trainer state carried between updates, created on the first run "
+                                        "(default: BUNDLE.online_state.pkl next to the bundle)")
+    update.add_argument("--batch-size", type=int, default=10_000, help="test cases per partial_fit call")
+    update.set_defaults(func=run_update)
+
+    train = commands.add_parser("train", help="retrain every model from parsed test cases (the modelToPkl.ipynb pipeline)")
+    train.add_argument("input", help="parsed test case csv or Parquet dataset directory")
+    train.add_argument("-o", "--output", default=DEFAULT_MODELS_DIR, help="directory the .pkl files and bundle go to")
+    train.add_argument("--cache-dir", help="stage outputs reused by later runs (default: OUTPUT/.train_cache)")
+    train.add_argument("--jobs", type=int, default=-1, help="cores the RandomForest is fitted on (-1: all)")
+    train.set_defaults(func=run_train)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
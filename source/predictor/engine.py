@@ -0,0 +1,135 @@
+"""Test case parsing and batched prediction, shared by the GUI, the CLI and the service."""
+import re
+
+import numpy as np
+from scipy import sparse
+
+SIMILAR_CASES_K = 3  # number of similar test cases returned per prediction
+
+
+def parse_test_case(line):
+    """Split 'TCID, num_steps, steps' into (tcid, num_steps, step_keywords), or None if invalid."""
+    parts = line.strip().split(",", 2)
+    if len(parts) != 3:
+        return None
+    tcid = parts[0].strip()
+    num_steps_str = parts[1].strip()
+    steps_raw = parts[2].strip()
+    if not tcid or not num_steps_str.isdigit():
+        return None
+    num_steps = int(num_steps_str)
+    found_steps = re.findall(r'\b\d+-', steps_raw)
+    if len(found_steps) != num_steps:
+        return None
+    step_keywords = re.sub(r'\b\d+-', '', steps_raw).strip()
+    return tcid, num_steps, step_keywords
+
+
+def validate_detailed_test_case(line: str) -> bool:
+    try:
+        return parse_test_case(line) is not None
+    except:
+        return False
+
+
+def feature_rows(X_keywords, X_steps):
+    """
+    The model input: TF-IDF rows with the scaled num_steps appended as the last column.
+    Same CSR matrix as sparse.hstack([X_keywords, csr_matrix(X_steps)]), built from the
+    arrays directly since the generic stacking dominates the cost of scoring one case.
+    """
+    X_keywords = X_keywords.tocsr()
+    n_rows, n_terms = X_keywords.shape
+    steps = np.asarray(X_steps, dtype=np.float64).reshape(-1)
+    has_steps = steps != 0  # csr_matrix drops explicit zeros
+    indptr = np.zeros(n_rows + 1, dtype=X_keywords.indptr.dtype)
+    np.cumsum(np.diff(X_keywords.indptr) + has_steps, out=indptr[1:])
+    step_positions = indptr[1:][has_steps] - 1
+    is_keyword = np.ones(indptr[-1], dtype=bool)
+    is_keyword[step_positions] = False
+    data = np.empty(indptr[-1], dtype=np.float64)
+    indices = np.empty(indptr[-1], dtype=X_keywords.indices.dtype)
+    data[is_keyword] = X_keywords.data
+    indices[is_keyword] = X_keywords.indices
+    data[step_positions] = steps[has_steps]
+    indices[step_positions] = n_terms
+    return sparse.csr_matrix((data, indices, indptr), shape=(n_rows, n_terms + 1))
+
+
+def predict_batch(models, lines, k=SIMILAR_CASES_K, cache=None):
+    """
+    Predict every line in one pass; returns one result dict (or None if invalid) per line.
+    With a PredictionCache, lines already scored by this model version skip the models.
+    """
+    models = models.snapshot()  # one model version for the whole batch, even across a hot reload
+    parsed = [parse_test_case(line) for line in lines]
+    valid = [i for i, p in enumerate(parsed) if p is not None]
+    results = [None] * len(lines)
+    if not valid:
+        return results
+
+    entries = {}
+    duplicates = {}
+    if cache is not None:
+        keys = {i: cache.key(models, parsed[i][1], parsed[i][2]) for i in valid}
+        entries = {i: cache.get(keys[i]) for i in valid}
+        # Score repeated lines of this batch once
+        first = {}
+        for i in valid:
+            if entries[i] is None and first.setdefault(keys[i], i) != i:
+                duplicates[i] = first[keys[i]]
+    to_score = [i for i in valid if entries.get(i) is None and i not in duplicates]
+
+    if to_score:
+        # Build one sparse (CSR) feature matrix for everything not cached
+        X_keywords = models.tfidf.transform([parsed[i][2] for i in to_score])
+        X_steps = models.scaler.transform([[parsed[i][1]] for i in to_score])
+        X_input = feature_rows(X_keywords, X_steps)
+
+        # Run every model once
+        pred_durations = models.reg.predict(X_input)
+        pred_passrates = models.clf.predict_proba(X_input)[:, 1] * 100
+        for row, i in enumerate(to_score):
+            entries[i] = {"duration": pred_durations[row], "passrate": pred_passrates[row], "similar": {}}
+            if cache is not None:
+                entries[i]["features"] = X_input[row]
+                cache.put(keys[i], entries[i])
+        for i, original in duplicates.items():
+            entries[i] = entries[original]
+
+    # Similar cases depend on the TCID (it is excluded from its own results) and k
+    similar_cases = {}
+    to_search = []
+    for i in valid:
+        similar = entries[i]["similar"].get((parsed[i][0], k))
+        if similar is None:
+            to_search.append(i)
+        else:
+            similar_cases[i] = similar
+    if to_search:
+        if cache is None:
+            X_search = X_input  # to_search == to_score
+        else:
+            X_search = sparse.vstack([entries[i]["features"] for i in to_search], format="csr")
+        found = models.similarity_index.query(X_search, k=k, exclude_ids=[parsed[i][0] for i in to_search])
+        for i, similar in zip(to_search, found):
+            similar_cases[i] = similar
+            if cache is not None:
+                cache.add_similar(entries[i], (parsed[i][0], k), similar)
+
+    for i in valid:
+        entry = entries[i]
+        results[i] = {
+            "predicted_duration": round(entry["duration"], 2),
+            "predicted_passrate": round(entry["passrate"], 1),
+            "similar_cases": list(similar_cases[i])
+        }
+    return results
+
+
+def parse_and_predict(models, test_input, cache=None):
+    try:
+        return predict_batch(models, [test_input], cache=cache)[0]
+    except Exception as e:
+        print("Error in parse_and_predict:", e)
+        return None
@@ -0,0 +1,156 @@
+import numpy as np
+from scipy import sparse
+
+# Marks a leaf in the children arrays (same value sklearn uses)
+TREE_LEAF = -1
+
+# Upper bound on densified input cells per prediction chunk
+MAX_CELLS_PER_CHUNK = 4_000_000
+
+# Rows traversed together; keeps a chunk's walkers and dense rows in cache
+CHUNK_ROWS = 256
+
+# Walkers that reached a leaf stay on it, so they are only dropped every few levels
+COMPACT_EVERY = 3
+
+# One record per node, so a traversal step is a single gather
+NODE_DTYPE = np.dtype([("feature", np.int32), ("threshold", np.float32), ("left", np.int32), ("right", np.int32)])
+
+
+# From this batch size on, a forest frozen from sklearn predicts with sklearn itself:
+# its compiled traversal overtakes the NumPy walk at about 500 rows (forest_latency.py)
+NATIVE_MIN_ROWS = 500
+
+
+class FrozenForest:
+    """
+    Inference-only RandomForestRegressor. All trees share one flat array of node
+    records (NODE_DTYPE) plus a value array; roots[t] is tree t's first node and
+    child indices are global, so the whole forest is three contiguous arrays. The
+    records are compiled for traversal (leaves point at themselves, thresholds are
+    rounded to float32) and stored that way in bundles, so they are memory-mapped
+    and shared between processes instead of rebuilt on every load.
+
+    predict() walks every tree for a chunk of rows at once, one level per step, and
+    returns exactly what sklearn's predict returns. That wins for the GUI's and the
+    service's small batches; for NATIVE_MIN_ROWS rows and more a forest frozen from
+    a pickle hands the batch to the sklearn forest it came from. Loaded from a
+    bundle there is no sklearn forest, and large batches take about twice as long
+    as sklearn would (benchmarks/forest_latency.py --bundle).
+    """
+
+    def __init__(self, nodes, value, roots, n_features, native=None):
+        self.nodes = nodes
+        self.value = value
+        self.roots = roots
+        self.n_features = n_features
+        self.native = native
+
+    @classmethod
+    def from_arrays(cls, feature, threshold, left, right, value, roots, n_features, native=None):
+        """Compile sklearn-style node arrays (leaves marked by TREE_LEAF children) into node records."""
+        # Leaves point at themselves, so a walker that is done just stays put
+        is_leaf = left == TREE_LEAF
+        node_ids = np.arange(len(is_leaf))
+        nodes = np.empty(len(is_leaf), dtype=NODE_DTYPE)
+        nodes["feature"] = np.where(is_leaf, 0, feature)
+        nodes["threshold"] = _float32_floor(np.where(is_leaf, np.inf, threshold))
+        nodes["left"] = np.where(is_leaf, node_ids, left)
+        nodes["right"] = np.where(is_leaf, node_ids, right)
+        return cls(nodes, np.asarray(value, dtype=np.float64), np.asarray(roots, dtype=np.int64), n_features, native)
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            if tree.value.shape[1] != 1:
+                raise ValueError("Only single-output forests can be frozen")
+            roots.append(offset)
+            features.append(tree.feature)
+            thresholds.append(tree.threshold)
+            lefts.append(np.where(tree.children_left == TREE_LEAF, TREE_LEAF, tree.children_left + offset))
+            rights.append(np.where(tree.children_right == TREE_LEAF, TREE_LEAF, tree.children_right + offset))
+            values.append(tree.value[:, 0, 0])
+            offset += tree.node_count
+        # With parallel jobs sklearn sums the trees in a varying order, so only a serial forest is reused
+        native = forest if forest.n_jobs in (None, 1) else None
+        return cls.from_arrays(
+            np.concatenate(features), np.concatenate(thresholds), np.concatenate(lefts), np.concatenate(rights),
+            np.concatenate(values), roots, forest.n_features_in_, native
+        )
+
+    def to_bundle(self):
+        arrays = {"nodes": self.nodes, "value": self.value, "roots": self.roots}
+        return arrays, {"n_features": int(self.n_features)}
+
+    @classmethod
+    def from_bundle(cls, arrays, meta):
+        if "nodes" not in arrays:
+            # Bundles written before the records were stored hold the sklearn-style arrays
+            return cls.from_arrays(
+                arrays["feature"], arrays["threshold"], arrays["left"], arrays["right"],
+                arrays["value"], arrays["roots"], meta["n_features"]
+            )
+        return cls(arrays["nodes"], arrays["value"], arrays["roots"], meta["n_features"])
+
+    def __getstate__(self):
+        # The sklearn forest is only a shortcut for large batches; never pickle it along
+        state = self.__dict__.copy()
+        state["native"] = None
+        return state
+
+    def predict(self, X):
+        n_samples = X.shape[0]
+        if self.native is not None and n_samples >= NATIVE_MIN_ROWS:
+            return self.native.predict(X)
+        leaves = np.empty((len(self.roots), n_samples), dtype=np.int32)
+        chunk = max(1, min(CHUNK_ROWS, MAX_CELLS_PER_CHUNK // max(1, self.n_features)))
+        for start in range(0, n_samples, chunk):
+            stop = min(start + chunk, n_samples)
+            leaves[:, start:stop] = self._apply(_as_dense_float32(X[start:stop]))
+        # Accumulate tree by tree, in order, like sklearn does (a pairwise sum would round differently)
+        out = np.zeros(n_samples, dtype=np.float64)
+        for tree_values in self.value[leaves]:
+            out += tree_values
+        return out / len(self.roots)
+
+    def _apply(self, X):
+        """Leaf node of every tree (rows) for every sample (columns) of a dense float32 X."""
+        n_trees, n_samples = len(self.roots), X.shape[0]
+        flat = X.ravel()
+        leaves = np.empty(n_trees * n_samples, dtype=np.int32)
+        # One walker per (tree, sample), tree-major
+        walker = np.arange(n_trees * n_samples)
+        node = np.repeat(np.asarray(self.roots, dtype=np.int32), n_samples)
+        row_offset = np.tile(np.arange(n_samples) * X.shape[1], n_trees)
+        depth = 0
+        while node.size:
+            record = self.nodes[node]
+            # Trees see float32 inputs and go left when x <= threshold, exactly like sklearn
+            go_right = flat[row_offset + record["feature"]] > record["threshold"]
+            nxt = np.where(go_right, record["right"], record["left"])
+            depth += 1
+            if depth % COMPACT_EVERY == 0:
+                # A walker stayed put only on a leaf
+                done = nxt == node
+                leaves[walker[done]] = nxt[done]
+                active = ~done
+                walker, nxt, row_offset = walker[active], nxt[active], row_offset[active]
+            node = nxt
+        return leaves.reshape(n_trees, n_samples)
+
+
+def _float32_floor(threshold):
+    """float32 thresholds t with x <= t exactly when x <= threshold, for every float32 x."""
+    rounded = threshold.astype(np.float32)
+    over = rounded > threshold
+    rounded[over] = np.nextafter(rounded[over], np.float32(-np.inf))
+    return rounded
+
+
+def _as_dense_float32(X):
+    if sparse.issparse(X):
+        return X.astype(np.float32).toarray()
+    return np.asarray(X, dtype=np.float32)
@@ -0,0 +1,65 @@
+"""
+Background prediction for UIs: a worker thread scores the lines chunk by chunk and
+reports each chunk through a queue, which the UI thread drains without blocking
+(the GUI polls it with root.after).
+"""
+import queue
+import threading
+
+from predictor.engine import SIMILAR_CASES_K, predict_batch
+
+
+class PredictionJob:
+    """
+    Scores lines on a daemon thread. poll() returns the events reported so far:
+
+        ("chunk", start, preds)   preds for lines[start:start + len(preds)]
+        ("done", total) | ("cancelled", scored) | ("error", exception)   (always last)
+
+    cancel() takes effect between chunks. The whole job uses one model version.
+    """
+
+    def __init__(self, models, lines, chunk_size=200, k=SIMILAR_CASES_K, cache=None):
+        self.models = models.snapshot()
+        self.lines = list(lines)
+        self.chunk_size = chunk_size
+        self.k = k
+        self.cache = cache
+        self.scored = 0
+        self._events = queue.Queue()
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="prediction-job", daemon=True)
+
+    @property
+    def total(self):
+        return len(self.lines)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def poll(self):
+        events = []
+        while True:
+            try:
+                events.append(self._events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def _run(self):
+        try:
+            for start in range(0, self.total, self.chunk_size):
+                if self._cancelled.is_set():
+                    self._events.put(("cancelled", self.scored))
+                    return
+                chunk = self.lines[start:start + self.chunk_size]
+                preds = predict_batch(self.models, chunk, k=self.k, cache=self.cache)
+                self.scored += len(chunk)
+                self._events.put(("chunk", start, preds))
+        except Exception as e:
+            self._events.put(("error", e))
+            return
+        self._events.put(("done", self.total))
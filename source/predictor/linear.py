@@ -0,0 +1,112 @@
+import numpy as np
+from scipy import sparse
+from scipy.special import expit
+
+
+class FrozenScaler:
+    """Inference-only MinMaxScaler: X * scale + min."""
+
+    def __init__(self, scale, min_, clip=False, feature_range=(0, 1)):
+        self.scale = scale
+        self.min = min_
+        self.clip = clip
+        self.feature_range = tuple(feature_range)
+
+    @classmethod
+    def from_sklearn(cls, scaler):
+        return cls(scaler.scale_, scaler.min_, getattr(scaler, "clip", False), scaler.feature_range)
+
+    def to_bundle(self):
+        return {"scale": np.asarray(self.scale), "min": np.asarray(self.min)}, {
+            "clip": self.clip, "feature_range": list(self.feature_range)
+        }
+
+    @classmethod
+    def from_bundle(cls, arrays, meta):
+        return cls(arrays["scale"], arrays["min"], meta["clip"], meta["feature_range"])
+
+    def transform(self, X):
+        X = np.array(X, dtype=np.float64)
+        X *= self.scale
+        X += self.min
+        if self.clip:
+            np.clip(X, self.feature_range[0], self.feature_range[1], out=X)
+        return X
+
+
+class FrozenLogistic:
+    """
+    Inference-only binary LogisticRegression: sigmoid(X . coef + intercept).
+    A single sparse row (one case's TF-IDF terms and scaled num_steps) is scored by
+    adding up the weights of its active features, in the order a sparse dot product
+    uses, so the probabilities match LogisticRegression.predict_proba exactly.
+    """
+
+    def __init__(self, coef, intercept, classes):
+        self.coef = coef
+        self.intercept = intercept
+        self.classes = classes
+        self._weights = np.ravel(coef)
+
+    @classmethod
+    def from_sklearn(cls, clf):
+        if clf.coef_.shape[0] != 1:
+            raise ValueError("Only binary classifiers can be frozen")
+        return cls(clf.coef_, clf.intercept_, clf.classes_)
+
+    def to_bundle(self):
+        return {
+            "coef": np.asarray(self.coef), "intercept": np.asarray(self.intercept),
+            "classes": np.asarray(self.classes)
+        }, {}
+
+    @classmethod
+    def from_bundle(cls, arrays, meta):
+        return cls(arrays["coef"], arrays["intercept"], arrays["classes"])
+
+    def decision_function(self, X):
+        if sparse.issparse(X) and X.shape[0] == 1:
+            return self._score_row(X.tocsr()) + self.intercept
+        scores = np.asarray(X @ self.coef.T) + self.intercept
+        return scores.reshape(-1)
+
+    def _score_row(self, row):
+        score = 0.0
+        for value, weight in zip(row.data.tolist(), self._weights[row.indices].tolist()):
+            score += value * weight
+        return np.array([score])
+
+    def predict_proba(self, X):
+        prob = expit(self.decision_function(X))
+        return np.vstack([1 - prob, prob]).T
+
+
+class FrozenLinearRegressor:
+    """
+    Inference-only linear regressor (e.g. a partial_fit SGDRegressor): X . coef + intercept,
+    clipped from below at min_value. Durations default to 0, since an unbounded linear
+    model happily predicts negative ones for short cases.
+    """
+
+    def __init__(self, coef, intercept, min_value=0.0):
+        self.coef = coef
+        self.intercept = intercept
+        self.min_value = min_value
+
+    @classmethod
+    def from_sklearn(cls, reg, min_value=0.0):
+        return cls(np.ravel(reg.coef_), np.ravel(reg.intercept_), min_value)
+
+    def to_bundle(self):
+        return {"coef": np.asarray(self.coef), "intercept": np.asarray(self.intercept)}, {"min_value": self.min_value}
+
+    @classmethod
+    def from_bundle(cls, arrays, meta):
+        # Bundles written before min_value was recorded predict durations too
+        return cls(arrays["coef"], arrays["intercept"], meta.get("min_value", 0.0))
+
+    def predict(self, X):
+        y = np.asarray(X @ self.coef).reshape(-1) + self.intercept[0]
+        if self.min_value is not None:
+            np.maximum(y, self.min_value, out=y)
+        return y
@@ -0,0 +1,172 @@
+"""
+Incremental training: absorb newly parsed test cases in mini-batches instead of
+refitting everything in modelToPkl.ipynb, then publish a bundle that main.py,
+the CLI and the service load like any other.
+
+    python -m predictor update history.csv --bundle online/bundle            # first run: the whole history
+    python -m predictor update parsed_test_cases.csv --bundle online/bundle  # afterwards: only the new cases
+
+The notebook's fitted vocabulary, SMOTE and RandomForest need the full dataset,
+so the online models differ: a HashingVectorizer with running document
+frequencies, partial_fit SGD log-loss classifier (balanced by running class
+counts) and SGD regressor, and a MinMaxScaler updated with partial_fit. The
+trainer keeps the raw hashed counts of every case it has seen, so the similarity
+index is appended to and re-weighted with the current idf on each publish.
+Predicted durations are clipped at 0 (see FrozenLinearRegressor).
+
+update() only ever replaces a bundle it published itself: a bundle of the
+notebook models is refused, so a first run on a few new cases cannot silently
+take the place of the shipped models.
+"""
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.linear_model import SGDClassifier, SGDRegressor
+from sklearn.preprocessing import MinMaxScaler
+
+from predictor.bundle import Bundle, publish_bundle
+from predictor.linear import FrozenLinearRegressor, FrozenLogistic, FrozenScaler
+from predictor.similarity import SimilarityIndex
+from predictor.vectorizer import HashedTfidf
+
+COLUMNS = ["test_id", "step_keywords", "num_steps", "duration", "result"]
+CLASSES = np.array([0, 1])  # FAIL, PASS
+
+# Hashed feature columns; the step vocabulary is small, and the LSH planes grow with this
+N_FEATURES = 2 ** 14
+
+
+class OnlineTrainer:
+    """Training state that grows one mini-batch (a DataFrame with COLUMNS) at a time."""
+
+    def __init__(self, n_features=N_FEATURES, random_state=42):
+        self.hasher = HashedTfidf(np.ones(n_features))
+        self.doc_freq = np.zeros(n_features, dtype=np.int64)
+        self.n_docs = 0
+        self.class_counts = np.zeros(len(CLASSES), dtype=np.int64)
+        self.scaler = MinMaxScaler()
+        # The default learning rate schedules swing too far on small first batches
+        self.clf = SGDClassifier(loss="log_loss", learning_rate="adaptive", eta0=0.1, random_state=random_state)
+        self.reg = SGDRegressor(learning_rate="adaptive", eta0=0.1, random_state=random_state)
+        self.counts = []  # raw hashed counts, one CSR block per batch
+        self.num_steps = []
+        self.test_ids = []
+        self.similar_case_details = {}
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def save(self, path):
+        self.counts = [sparse.vstack(self.counts, format="csr")] if self.counts else []
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(self, f)
+        os.replace(tmp_path, path)
+
+    @property
+    def idf(self):
+        # Same smoothing as TfidfVectorizer(smooth_idf=True)
+        return np.log((1 + self.n_docs) / (1 + self.doc_freq)) + 1
+
+    def _features(self, counts, num_steps, tfidf, scaler):
+        X_steps = scaler.transform(np.asarray(num_steps, dtype=np.float64).reshape(-1, 1))
+        return sparse.hstack([tfidf.weight(counts), sparse.csr_matrix(X_steps)], format="csr")
+
+    def partial_fit(self, df):
+        """Update every model with one batch of parsed test cases. Returns the rows used."""
+        df = df.dropna(subset=COLUMNS[1:])
+        y_class = df["result"].astype(str).map({"PASS": 1, "FAIL": 0})
+        df, y_class = df[y_class.notna()], y_class[y_class.notna()].to_numpy(dtype=np.int64)
+        if df.empty:
+            return 0
+
+        counts = self.hasher.counts(df["step_keywords"])
+        self.doc_freq += np.bincount(counts.indices, minlength=len(self.doc_freq))
+        self.n_docs += len(df)
+        self.class_counts += np.bincount(y_class, minlength=len(CLASSES))
+        num_steps = df["num_steps"].to_numpy(dtype=np.float64)
+        self.scaler.partial_fit(num_steps.reshape(-1, 1))
+
+        X = self._features(counts, num_steps, HashedTfidf(self.idf), self.scaler)
+        # class_weight="balanced" over everything seen so far
+        weights = self.class_counts.sum() / (len(CLASSES) * self.class_counts[y_class])
+        self.clf.partial_fit(X, y_class, classes=CLASSES, sample_weight=weights)
+        self.reg.partial_fit(X, df["duration"].to_numpy(dtype=np.float64))
+
+        self.counts.append(counts)
+        self.num_steps.extend(num_steps.tolist())
+        self.test_ids.extend(df["test_id"].astype(str))
+        for row in df.itertuples():
+            self.similar_case_details[str(row.test_id)] = {
+                "steps": str(row.step_keywords).strip(), "duration": str(row.duration), "result": str(row.result)
+            }
+        return len(df)
+
+    def frozen(self):
+        """The current models as bundle artifacts (see predictor.bundle.export_bundle)."""
+        if not self.n_docs:
+            raise ValueError("Nothing trained yet")
+        tfidf = HashedTfidf(self.idf, self.hasher.token_pattern, self.hasher.lowercase, self.hasher.norm)
+        scaler = FrozenScaler.from_sklearn(self.scaler)
+        X_features = self._features(sparse.vstack(self.counts, format="csr"), self.num_steps, tfidf, scaler)
+        return {
+            "tfidf": tfidf,
+            "scaler": scaler,
+            "clf": FrozenLogistic.from_sklearn(self.clf),
+            "reg": FrozenLinearRegressor.from_sklearn(self.reg),
+            "similarity_index": SimilarityIndex.build(X_features, self.test_ids),
+            "similar_case_details": self.similar_case_details,
+        }
+
+    def publish(self, bundle_dir):
+        return publish_bundle(bundle_dir, **self.frozen())
+
+
+def iter_frames(path, batch_size=10_000):
+    """Read parsed test cases from a csv or a Parquet dataset directory in batches."""
+    if os.path.isdir(path):
+        import pyarrow.dataset as ds
+
+        for batch in ds.dataset(path, format="parquet").to_batches(columns=COLUMNS, batch_size=batch_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=COLUMNS, chunksize=batch_size)
+
+
+def is_online_bundle(bundle_dir):
+    """Whether bundle_dir holds models published by an OnlineTrainer (hashed TF-IDF)."""
+    artifacts = Bundle(bundle_dir).manifest["artifacts"]
+    return artifacts.get("tfidf", {}).get("type") == HashedTfidf.__name__
+
+
+def default_state_path(bundle_dir):
+    """Trainer state kept next to the bundle it publishes, so each bundle has its own."""
+    bundle_dir = os.path.abspath(bundle_dir)
+    return os.path.join(os.path.dirname(bundle_dir), os.path.basename(bundle_dir) + ".online_state.pkl")
+
+
+def update(inputs, state_path, bundle_dir, batch_size=10_000):
+    """
+    Feed inputs to the trainer saved at state_path (new if missing) and publish bundle_dir.
+    Raises ValueError if bundle_dir holds a bundle that was not published by online training.
+    """
+    if Bundle.exists(bundle_dir) and not is_online_bundle(bundle_dir):
+        raise ValueError(
+            f"{bundle_dir} holds a bundle of the fully trained models; "
+            "publish online models to another directory (or remove it first)"
+        )
+    for path in (state_path, bundle_dir):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    trainer = OnlineTrainer.load(state_path) if os.path.exists(state_path) else OnlineTrainer()
+    added = 0
+    for path in inputs:
+        for df in iter_frames(path, batch_size):
+            added += trainer.partial_fit(df)
+    trainer.save(state_path)
+    trainer.publish(bundle_dir)
+    return added, trainer.n_docs
@@ -0,0 +1,154 @@
+"""
+Column-oriented ordered results: predictions are kept as NumPy columns, and the
+order for each sort key is computed once with a stable argsort and then reused.
+schedule() picks the cases worth running when a bench only has a fixed time budget.
+"""
+import numpy as np
+
+SORT_KEYS = ["Priority", "Duration", "Pass Rate", "TCID"]
+
+# Guards the priority formulas against zero (or, from a linear model, negative) durations
+MIN_DURATION = 1e-3
+
+
+def fail_per_second(passrate, duration):
+    """Expected failures found per second of runtime: P(fail) / duration."""
+    return (1 - passrate / 100) / np.maximum(duration, MIN_DURATION)
+
+
+def fail_probability(passrate, duration):
+    """Most likely failures first, regardless of runtime."""
+    return 1 - passrate / 100
+
+
+def shortest_first(passrate, duration):
+    """Quickest feedback first."""
+    return -duration
+
+
+# Priority formulas selectable by name; higher score runs earlier
+PRIORITY_FORMULAS = {
+    "fail_per_second": fail_per_second,
+    "fail_probability": fail_probability,
+    "shortest_first": shortest_first,
+}
+DEFAULT_PRIORITY = "fail_per_second"
+
+
+def schedule(passrate, duration, budget):
+    """
+    Choose the cases to run within budget seconds so that the expected number of
+    failures found (the sum of P(fail)) is as large as possible. This is a 0/1
+    knapsack, approximated greedily: cases are taken by P(fail) per second while
+    they fit, skipped ones leave room for shorter cases further down, and the single
+    most likely failure replaces the lot if it alone is worth more (so the result is
+    never worse than half the optimum). Returns the chosen indices in run order.
+    """
+    value = 1 - passrate / 100
+    weight = np.maximum(duration, MIN_DURATION)
+    by_density = np.argsort(-(value / weight), kind="stable")
+
+    # The leading run of cases that fit is a prefix sum; only the rest needs a loop
+    taken = int(np.searchsorted(np.cumsum(weight[by_density]), budget, side="right"))
+    chosen = by_density[:taken].tolist()
+    remaining = budget - weight[chosen].sum()
+    rest = by_density[taken:]
+    for i in rest[weight[rest] <= remaining].tolist():
+        if weight[i] <= remaining:
+            chosen.append(i)
+            remaining -= weight[i]
+
+    fits = np.flatnonzero(weight <= budget)
+    if len(fits):
+        best = fits[np.argmax(value[fits])]
+        if value[best] > value[chosen].sum():
+            chosen = [best]
+    return np.array(chosen, dtype=np.intp)
+
+
+class SortedView:
+    """Read-only sequence of the records in one order, without copying them."""
+
+    def __init__(self, records, order):
+        self.records = records
+        self.order = order
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.records[i] for i in self.order[index]]
+        return self.records[self.order[index]]
+
+    def __iter__(self):
+        return (self.records[i] for i in self.order)
+
+
+class ResultTable:
+    """
+    Ordered-results columns (tcid, duration, passrate, priority) next to the record
+    dicts used for display and export. sorted(key) returns a SortedView; each key's
+    order is argsorted on first use and cached, so switching sorts afterwards is O(1).
+    """
+
+    def __init__(self, records, priority=DEFAULT_PRIORITY):
+        self.records = list(records)
+        self.tcid = np.array([r["tcid"] for r in self.records], dtype=str)
+        self.duration = np.array([r["predicted_duration"] for r in self.records], dtype=np.float64)
+        self.passrate = np.array([r["predicted_passrate"] for r in self.records], dtype=np.float64)
+        self._orders = {}
+        self._schedules = {}
+        self.set_priority(priority)
+
+    def __len__(self):
+        return len(self.records)
+
+    def set_priority(self, priority):
+        """Switch the priority formula (a PRIORITY_FORMULAS name or a function of passrate, duration)."""
+        formula = PRIORITY_FORMULAS[priority] if isinstance(priority, str) else priority
+        self.priority_name = priority if isinstance(priority, str) else getattr(priority, "__name__", "custom")
+        self.priority = formula(self.passrate, self.duration)
+        self._orders.pop("Priority", None)
+
+    def order(self, key):
+        if key not in self._orders:
+            if key == "Priority":
+                order = np.argsort(-self.priority, kind="stable")
+            elif key == "Duration":
+                order = np.argsort(self.duration, kind="stable")
+            elif key == "Pass Rate":
+                order = np.argsort(self.passrate, kind="stable")
+            elif key == "TCID":
+                order = np.argsort(self.tcid, kind="stable")
+            else:
+                raise ValueError(f"Unknown sort key: {key}")
+            self._orders[key] = order
+        return self._orders[key]
+
+    def plan(self, budget=None):
+        """
+        The cases schedule() fits into budget seconds (all of them when budget is None),
+        with their projected runtime and expected failures found.
+        """
+        if budget not in self._schedules:
+            if budget is None:
+                chosen = np.arange(len(self.records))
+            else:
+                chosen = schedule(self.passrate, self.duration, budget)
+            self._schedules[budget] = {
+                "order": chosen,
+                "budget": budget,
+                "runtime": float(np.maximum(self.duration[chosen], 0).sum()),
+                "expected_failures": float((1 - self.passrate[chosen] / 100).sum()),
+            }
+        return self._schedules[budget]
+
+    def sorted(self, key, budget=None):
+        """The records in key order, restricted to the cases planned for budget seconds."""
+        order = self.order(key)
+        if budget is not None:
+            chosen = np.zeros(len(self.records), dtype=bool)
+            chosen[self.plan(budget)["order"]] = True
+            order = order[chosen[order]]
+        return SortedView(self.records, order)
@@ -0,0 +1,345 @@
+import hashlib
+import json
+import math
+import os
+import pickle
+import threading
+
+from predictor.similarity import SimilarityIndex
+from predictor.ann import make_similarity_backend
+from predictor.bundle import MANIFEST, Bundle, file_digest
+from predictor.engine import predict_batch
+from predictor.forest import FrozenForest
+from predictor.linear import FrozenLogistic
+from predictor.vectorizer import FrozenTfidf
+
+# Artifacts in the order the background loader warms them up
+ARTIFACTS = ["tfidf", "scaler", "clf", "test_ids", "similarity_index", "similar_case_details", "reg"]
+
+# Memory-mapped bundle (see predictor.bundle), preferred over the pickles when present
+BUNDLE_DIR = "bundle"
+
+# Files whose change means a retrained model set was dropped into base_dir; the bundle
+# manifest changes when publish_bundle swaps in a whole new bundle directory
+WATCHED_FILES = [
+    "tfidf.pkl", "scaler.pkl", "clf.pkl", "reg.pkl", "test_ids.pkl", "X_features.pkl",
+    "similarity_index.pkl", "similar_case_details.pkl", os.path.join(BUNDLE_DIR, MANIFEST),
+]
+
+# Pickled models a bundle is exported from (see pickle_digests)
+PICKLE_FILES = [filename for filename in WATCHED_FILES if filename.endswith(".pkl")]
+
+# Scored by every reloaded model set before it is swapped in
+PROBE_LINE = "TestCase000_Probe, 2, 1-Set ARM Switch is ON; 2-Send LB CONF Message"
+
+# How far a reloaded model set's probe prediction may move from the current one's
+PROBE_MAX_DURATION_RATIO = 10.0
+PROBE_MIN_DURATION = 1.0  # seconds; below this, durations are compared as if they were 1s
+PROBE_MAX_PASSRATE_SHIFT = 50.0  # percentage points
+
+
+class ModelRegistry:
+    """
+    Holds the model artifacts of one bundle directory.
+    Each artifact is loaded on first use (models.clf, models.get("clf")), and
+    load_in_background() warms all of them on a worker thread. Artifacts come from
+    base_dir/bundle/ when it exists and from the .pkl files otherwise; a bundle older
+    than retrained .pkl files next to it is ignored, with a warning.
+    similarity_params (n_tables, n_bits, n_probe_tables) tune an LSH similarity backend.
+    """
+
+    def __init__(self, base_dir, similarity_backend="auto", similarity_params=None):
+        self.base_dir = base_dir
+        self.similarity_backend = similarity_backend
+        self.similarity_params = dict(similarity_params or {})
+        self.state = "idle"  # idle -> loading -> ready | failed
+        self.error = None
+        self._artifacts = {}
+        self._locks = {name: threading.Lock() for name in ARTIFACTS}
+        self._thread = None
+        self.bundle = self._open_bundle()
+        # Identifies this exact model set, e.g. in PredictionCache keys. Hashed now, from the
+        # files this registry opened, so a retrain published later never shares its key
+        identity = repr((
+            artifact_digest(base_dir, self.bundle), similarity_backend, sorted(self.similarity_params.items())
+        )).encode()
+        self.model_key = hashlib.sha1(identity).hexdigest()[:16]
+
+    @property
+    def ready(self):
+        return self.state == "ready"
+
+    @property
+    def loaded_count(self):
+        return len(self._artifacts)
+
+    def path(self, filename):
+        return os.path.join(self.base_dir, filename)
+
+    def _open_bundle(self):
+        bundle_dir = self.path(BUNDLE_DIR)
+        if not Bundle.exists(bundle_dir):
+            return None
+        bundle = Bundle(bundle_dir)
+        newer = newer_pickles(self.base_dir, bundle)
+        if newer:
+            print(
+                f"Ignoring the bundle in {bundle_dir}: {', '.join(newer)} changed since it was exported. "
+                "Loading the .pkl files; republish the bundle (predictor.bundle.publish_bundle) to use it again."
+            )
+            return None
+        return bundle
+
+    def snapshot(self):
+        """The registry a single prediction should use throughout (see ModelHandle)."""
+        return self
+
+    def __getattr__(self, name):
+        if name in ARTIFACTS:
+            return self.get(name)
+        raise AttributeError(name)
+
+    def get(self, name):
+        if name in self._artifacts:
+            return self._artifacts[name]
+        with self._locks[name]:
+            if name not in self._artifacts:
+                self._artifacts[name] = getattr(self, f"_load_{name}")()
+        return self._artifacts[name]
+
+    def load_all(self):
+        self.state = "loading"
+        try:
+            for name in ARTIFACTS:
+                self.get(name)
+        except Exception as e:
+            self.error = e
+            self.state = "failed"
+            raise
+        self.state = "ready"
+
+    def load_in_background(self):
+        """Start loading every artifact on a daemon thread (no-op if already started)."""
+        if self._thread is not None:
+            return self._thread
+        self.state = "loading"
+        self._thread = threading.Thread(target=self._background_load, name="model-loader", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def _background_load(self):
+        try:
+            self.load_all()
+        except Exception as e:
+            print("Error while loading models:", e)
+
+    def _load_pickle(self, filename):
+        with open(self.path(filename), "rb") as f:
+            return pickle.load(f)
+
+    def _load_artifact(self, name, filename):
+        if self.bundle is not None and name in self.bundle:
+            return self.bundle.load(name)
+        return self._load_pickle(filename)
+
+    def _load_clf(self):
+        clf = self._load_artifact("clf", "clf.pkl")
+        # Frozen, a pickled LogisticRegression skips sklearn's input checks on every call
+        if type(clf).__name__ == "LogisticRegression":
+            return FrozenLogistic.from_sklearn(clf)
+        return clf
+
+    def _load_reg(self):
+        reg = self._load_artifact("reg", "reg.pkl")
+        # A pickled sklearn forest is flattened once; FrozenForest.predict gives the same output
+        if type(reg).__name__ == "RandomForestRegressor":
+            return FrozenForest.from_sklearn(reg)
+        return reg
+
+    def _load_tfidf(self):
+        tfidf = self._load_artifact("tfidf", "tfidf.pkl")
+        if type(tfidf).__name__ == "TfidfVectorizer":
+            try:
+                return FrozenTfidf.from_sklearn(tfidf)
+            except ValueError:
+                pass  # settings FrozenTfidf does not reproduce; keep sklearn's transform
+        return tfidf
+
+    def _load_scaler(self):
+        return self._load_artifact("scaler", "scaler.pkl")
+
+    def _load_test_ids(self):
+        if self.bundle is not None and "similarity_index" in self.bundle:
+            return self.bundle.array("similarity_index", "test_ids").tolist()
+        return self._load_pickle("test_ids.pkl")
+
+    def _load_similar_case_details(self):
+        return self._load_artifact("similar_case_details", "similar_case_details.pkl")
+
+    def _load_similarity_index(self):
+        if self.bundle is not None and "similarity_index" in self.bundle:
+            index = self.bundle.load("similarity_index")
+        elif os.path.exists(self.path("similarity_index.pkl")):
+            index = SimilarityIndex.load(self.path("similarity_index.pkl"))
+        else:
+            # Older bundles only ship X_features.pkl, so build the index here
+            index = SimilarityIndex.build(self._load_pickle("X_features.pkl"), self.get("test_ids"))
+        return make_similarity_backend(index, self.similarity_backend, **self.similarity_params)
+
+
+def artifact_fingerprint(base_dir):
+    """(file, mtime, size) of every watched artifact that exists in base_dir."""
+    fingerprint = []
+    for filename in WATCHED_FILES:
+        try:
+            stat = os.stat(os.path.join(base_dir, filename))
+        except FileNotFoundError:
+            continue
+        fingerprint.append((filename, stat.st_mtime_ns, stat.st_size))
+    return tuple(fingerprint)
+
+
+def pickle_digests(base_dir):
+    """{filename: file_digest} of the pickled models in base_dir, for export_bundle(sources=...)."""
+    return {
+        filename: file_digest(os.path.join(base_dir, filename))
+        for filename in PICKLE_FILES if os.path.exists(os.path.join(base_dir, filename))
+    }
+
+
+def newer_pickles(base_dir, bundle):
+    """
+    The .pkl files in base_dir written after bundle was exported. Only files with a later
+    mtime are hashed, and those whose contents match the digests the bundle recorded
+    (e.g. after a fresh checkout) do not count.
+    """
+    exported = os.path.getmtime(os.path.join(bundle.directory, MANIFEST))
+    sources = bundle.manifest.get("sources", {})
+    newer = []
+    for filename in PICKLE_FILES:
+        path = os.path.join(base_dir, filename)
+        try:
+            if os.path.getmtime(path) <= exported:
+                continue
+        except FileNotFoundError:
+            continue
+        if sources.get(filename) != file_digest(path):
+            newer.append(filename)
+    return newer
+
+
+def artifact_digest(base_dir, bundle=None):
+    """
+    Content hash of the model set in base_dir: the bundle's manifest (less its creation
+    time) and data files when there is a bundle, the .pkl files otherwise. Unlike
+    artifact_fingerprint it stays the same across checkouts and copies of identical files.
+    """
+    digest = hashlib.sha1()
+    if bundle is not None:
+        manifest = {key: value for key, value in bundle.manifest.items() if key != "created"}
+        digest.update(json.dumps(manifest, sort_keys=True).encode())
+        paths = [os.path.join(bundle.directory, name) for name in sorted(os.listdir(bundle.directory)) if name != MANIFEST]
+    else:
+        paths = [os.path.join(base_dir, filename) for filename in WATCHED_FILES if filename.endswith(".pkl")]
+    for path in paths:
+        if not os.path.isfile(path):
+            continue
+        digest.update(os.path.basename(path).encode())
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+class ModelHandle:
+    """
+    Versioned handle on the ModelRegistry of base_dir, usable wherever a registry is.
+    watch() polls the artifact files; once a change has settled, a new registry is
+    loaded on the watcher thread, checked with PROBE_LINE and swapped in with one
+    assignment. predict_batch takes snapshot() once, so predictions already running
+    finish on the version they started with.
+
+    Retrained bundles must arrive atomically: publish them with publish_bundle (a
+    directory rename), never by copying over an existing bundle/, whose memory-mapped
+    arrays the running version is still reading.
+    """
+
+    def __init__(self, base_dir, similarity_backend="auto", similarity_params=None):
+        self.base_dir = base_dir
+        self.similarity_backend = similarity_backend
+        self.similarity_params = similarity_params
+        self.current = ModelRegistry(base_dir, similarity_backend, similarity_params)
+        self.version = 1
+        self.fingerprint = artifact_fingerprint(base_dir)
+        self.reload_error = None
+        self._stop = threading.Event()
+        self._watcher = None
+
+    def __getattr__(self, name):
+        # state, ready, tfidf, load_in_background, ... of the current version
+        if name == "current":
+            raise AttributeError(name)
+        return getattr(self.current, name)
+
+    def snapshot(self):
+        return self.current
+
+    def reload(self):
+        """Load base_dir into a new registry and swap it in if it passes the probe. Returns success."""
+        self.fingerprint = artifact_fingerprint(self.base_dir)
+        try:
+            candidate = ModelRegistry(self.base_dir, self.similarity_backend, self.similarity_params)
+            candidate.load_all()
+            self._check(candidate, self.current)
+        except Exception as e:
+            self.reload_error = e
+            print(f"Keeping model version {self.version}, reload failed:", e)
+            return False
+        self.current = candidate
+        self.version += 1
+        self.reload_error = None
+        print(f"Model version {self.version} loaded from {self.base_dir}")
+        return True
+
+    @staticmethod
+    def _check(registry, current=None):
+        """
+        Raise ValueError unless registry's probe prediction is sane: a finite, non-negative
+        duration and a pass rate within [0, 100], not wildly off the current version's.
+        """
+        if not len(registry.test_ids):
+            raise ValueError("similarity index is empty")
+        result = predict_batch(registry, [PROBE_LINE])[0]
+        duration, passrate = result["predicted_duration"], result["predicted_passrate"]
+        if not math.isfinite(duration) or duration < 0 or not 0 <= passrate <= 100:
+            raise ValueError(f"probe prediction out of range: {result}")
+        if current is None or current.state == "failed":
+            return
+        try:
+            reference = predict_batch(current, [PROBE_LINE])[0]
+        except Exception:
+            return  # nothing trustworthy to compare against
+        ratio = max(duration, PROBE_MIN_DURATION) / max(reference["predicted_duration"], PROBE_MIN_DURATION)
+        if not 1 / PROBE_MAX_DURATION_RATIO <= ratio <= PROBE_MAX_DURATION_RATIO:
+            raise ValueError(f"probe duration moved from {reference['predicted_duration']} to {duration}")
+        if abs(passrate - reference["predicted_passrate"]) > PROBE_MAX_PASSRATE_SHIFT:
+            raise ValueError(f"probe pass rate moved from {reference['predicted_passrate']} to {passrate}")
+
+    def watch(self, interval=5.0):
+        """Start polling base_dir on a daemon thread (no-op if already watching)."""
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, args=(interval,), name="model-watcher", daemon=True)
+            self._watcher.start()
+        return self._watcher
+
+    def stop(self):
+        self._stop.set()
+
+    def _watch(self, interval):
+        seen = self.fingerprint
+        while not self._stop.wait(interval):
+            fingerprint = artifact_fingerprint(self.base_dir)
+            # Reload only once the files stopped changing, i.e. the retraining finished writing
+            if fingerprint != self.fingerprint and fingerprint == seen:
+                self.reload()
+            seen = fingerprint
@@ -0,0 +1,224 @@
+"""
+Local HTTP prediction service that keeps one warm ModelRegistry for all callers.
+
+    POST /predict        {"test_case": "TC1, 2, 1-...; 2-..."}      (like parse_and_predict)
+    POST /predict/batch  {"test_cases": ["TC1, ...", "TC2, ..."]}   (like Order Now)
+    GET  /stats          request counts and latency percentiles per endpoint
+    GET  /health         model loading state and version
+
+Concurrent requests are coalesced by a MicroBatcher into a single predict_batch call.
+"""
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from predictor.engine import SIMILAR_CASES_K, parse_test_case, predict_batch
+
+
+class MicroBatcher:
+    """
+    Collects lines from concurrent submit() calls for up to max_wait seconds (or
+    max_batch lines) and scores them with one predict_batch call per batch.
+    """
+
+    def __init__(self, models, max_batch=512, max_wait=0.005, workers=1, k=SIMILAR_CASES_K, cache=None):
+        self.models = models
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.k = k
+        self.cache = cache
+        self.batches = 0
+        self.batched_lines = 0
+        self._queue = queue.Queue()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"micro-batcher-{i}", daemon=True) for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, lines):
+        """Queue lines for prediction; the returned Future resolves to one result per line."""
+        future = Future()
+        self._queue.put((list(lines), future))
+        return future
+
+    def _collect(self):
+        pending = [self._queue.get()]
+        size = len(pending[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            pending.append(item)
+            size += len(item[0])
+        return pending
+
+    def _run(self):
+        while True:
+            pending = self._collect()
+            lines = [line for item_lines, _ in pending for line in item_lines]
+            try:
+                results = predict_batch(self.models, lines, k=self.k, cache=self.cache)
+            except Exception as e:
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.batched_lines += len(lines)
+            start = 0
+            for item_lines, future in pending:
+                future.set_result(results[start:start + len(item_lines)])
+                start += len(item_lines)
+
+
+class LatencyStats:
+    """Keeps the most recent request latencies per endpoint."""
+
+    def __init__(self, window=10_000):
+        self.window = window
+        self._samples = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, seconds):
+        with self._lock:
+            self._samples.setdefault(endpoint, deque(maxlen=self.window)).append(seconds * 1000)
+            self._counts[endpoint] = self._counts.get(endpoint, 0) + 1
+
+    def summary(self):
+        with self._lock:
+            snapshot = {name: np.array(samples) for name, samples in self._samples.items()}
+            counts = dict(self._counts)
+        return {
+            name: {
+                "count": counts[name],
+                "p50_ms": round(float(np.percentile(ms, 50)), 3),
+                "p95_ms": round(float(np.percentile(ms, 95)), 3),
+                "p99_ms": round(float(np.percentile(ms, 99)), 3),
+                "max_ms": round(float(ms.max()), 3),
+            }
+            for name, ms in snapshot.items()
+        }
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    server_version = "TestCasePredictor/1.0"
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._timed("/health", self._health)
+        elif self.path == "/stats":
+            self._timed("/stats", self._stats)
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path == "/predict":
+            self._timed("/predict", self._predict_one)
+        elif self.path == "/predict/batch":
+            self._timed("/predict/batch", self._predict_many)
+        else:
+            self._send(404, {"error": "not found"})
+
+    def _timed(self, endpoint, handler):
+        start = time.perf_counter()
+        try:
+            status, body = handler()
+        except ValueError as e:
+            status, body = 400, {"error": str(e)}
+        except Exception as e:
+            status, body = 500, {"error": str(e)}
+        self._send(status, body)
+        self.server.stats.record(endpoint, time.perf_counter() - start)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            raise ValueError("request body must be JSON")
+        if not isinstance(body, dict):
+            raise ValueError("request body must be a JSON object")
+        return body
+
+    def _predict_one(self):
+        test_case = self._read_json().get("test_case")
+        if not isinstance(test_case, str) or parse_test_case(test_case) is None:
+            raise ValueError("Invalid format! Expected 'TCID, num_steps, 1-step; 2-step; ...'")
+        result = self.server.batcher.submit([test_case]).result()[0]
+        return 200, dict(result, tcid=parse_test_case(test_case)[0])
+
+    def _predict_many(self):
+        test_cases = self._read_json().get("test_cases")
+        if not isinstance(test_cases, list):
+            raise ValueError("'test_cases' must be a list of lines")
+        lines = [line.strip() for line in test_cases if isinstance(line, str) and line.strip()]
+        for line in lines:
+            if parse_test_case(line) is None:
+                raise ValueError(f"Invalid format: {line}")
+        results = []
+        for line, pred in zip(lines, self.server.batcher.submit(lines).result()):
+            parts = line.split(",", 2)
+            pred["tcid"] = parts[0].strip()
+            pred["steps"] = [s.strip() for s in parts[2].split(";") if s.strip()]
+            results.append(pred)
+        return 200, {"results": results}
+
+    def _health(self):
+        models = self.server.models
+        return 200, {"state": models.state, "version": getattr(models, "version", 1)}
+
+    def _stats(self):
+        batcher = self.server.batcher
+        return 200, {
+            "endpoints": self.server.stats.summary(),
+            "batches": batcher.batches,
+            "mean_batch_size": round(batcher.batched_lines / batcher.batches, 2) if batcher.batches else 0,
+            "cache": batcher.cache.stats if batcher.cache is not None else None,
+        }
+
+    def _send(self, status, body):
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass  # per-request logging would dominate the latency of small requests
+
+
+class PredictionServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # bursts of concurrent clients are the point of micro-batching
+
+    def __init__(self, address, models, **batcher_options):
+        super().__init__(address, PredictionHandler)
+        self.models = models
+        self.stats = LatencyStats()
+        self.batcher = MicroBatcher(models, **batcher_options)
+
+
+def serve(models, host="127.0.0.1", port=8080, **batcher_options):
+    """Warm every model artifact, then serve until interrupted."""
+    models.load_all()
+    server = PredictionServer((host, port), models, **batcher_options)
+    print(f"Serving predictions on http://{host}:{server.server_port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,83 @@
+import pickle
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+# Upper bound on query x corpus scores held in memory at once
+MAX_SCORES_PER_CHUNK = 4_000_000
+
+
+class SimilarityIndex:
+    """Cosine top-k search over L2-normalized feature rows."""
+
+    def __init__(self, rows, test_ids):
+        self.rows = sparse.csr_matrix(rows)
+        self.test_ids = list(test_ids)
+        self.positions = {}
+        for pos, test_id in enumerate(self.test_ids):
+            self.positions.setdefault(test_id, []).append(pos)
+
+    def __len__(self):
+        return self.rows.shape[0]
+
+    @classmethod
+    def build(cls, X_features, test_ids):
+        """Normalize the stored feature rows once so queries are plain dot products."""
+        return cls(normalize(sparse.csr_matrix(X_features)), test_ids)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+        return cls(data["rows"], data["test_ids"])
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            pickle.dump({"rows": self.rows, "test_ids": self.test_ids}, f)
+
+    def to_bundle(self):
+        arrays = {
+            "data": self.rows.data, "indices": self.rows.indices, "indptr": self.rows.indptr,
+            "test_ids": np.array(self.test_ids)
+        }
+        return arrays, {"shape": list(self.rows.shape)}
+
+    @classmethod
+    def from_bundle(cls, arrays, meta):
+        rows = sparse.csr_matrix((arrays["data"], arrays["indices"], arrays["indptr"]), shape=tuple(meta["shape"]))
+        return cls(rows, arrays["test_ids"].tolist())
+
+    def query(self, X, k=3, exclude_ids=None):
+        """
+        Return the ids of the k most similar stored cases for every row of X.
+        exclude_ids[i] (if given) is dropped from row i's results when it is in the corpus.
+        """
+        X = normalize(sparse.csr_matrix(X))
+        n_queries = X.shape[0]
+        k = min(k, len(self))
+        if k <= 0:
+            return [[] for _ in range(n_queries)]
+
+        chunk = max(1, MAX_SCORES_PER_CHUNK // max(1, len(self)))
+        results = []
+        for start in range(0, n_queries, chunk):
+            stop = min(start + chunk, n_queries)
+            sims = (X[start:stop] @ self.rows.T).toarray()
+            if exclude_ids is not None:
+                for row in range(stop - start):
+                    for pos in self.positions.get(exclude_ids[start + row], ()):
+                        sims[row, pos] = -np.inf
+            results.extend(self._top_k(sims, k))
+        return results
+
+    def _top_k(self, sims, k):
+        # O(n) selection of the k best columns, then order just those k
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(sims, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        return [
+            [self.test_ids[j] for j, score in zip(row, scores) if score > -np.inf]
+            for row, scores in zip(top, top_scores)
+        ]
@@ -0,0 +1,206 @@
+"""
+Full retraining as a script: the modelToPkl.ipynb pipeline split into cached stages.
+
+    python -m predictor train parsed_test_cases_augmented.csv
+    python -m predictor train parsed_test_cases/ -o models/ --cache-dir /var/cache/predictor
+
+    featurize ──┬── resample ── classifier
+                ├── regressor
+                └── similarity index
+
+Each stage pickles its output into the cache directory under a key hashed from
+its inputs (the data, the keys of the stages it reads from and its own
+settings), so a rerun only recomputes the stages whose inputs changed. The three
+branches run concurrently on threads, since sklearn, SMOTE and NumPy do their
+heavy lifting outside the GIL, and the RandomForest builds its trees on all
+cores. Models are fitted exactly as in the notebook, with the same random
+states, and written out as the same .pkl files plus the bundle.
+"""
+import hashlib
+import os
+import pickle
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from scipy import sparse
+
+from predictor.bundle import publish_bundle
+from predictor.registry import BUNDLE_DIR, pickle_digests
+from predictor.similarity import SimilarityIndex
+
+COLUMNS = ["test_id", "step_keywords", "num_steps", "duration", "result"]
+
+# Notebook settings; changing any of them changes the keys of the stages using it
+RANDOM_STATE = 42
+TEST_SIZE = 0.2
+CLF_MAX_ITER = 1000
+N_ESTIMATORS = 100
+
+CACHE_DIR = ".train_cache"
+
+
+def input_fingerprint(path):
+    """Hash of the contents of a csv, or of every file in a Parquet dataset directory."""
+    if os.path.isdir(path):
+        files = sorted(os.path.join(root, name) for root, _, names in os.walk(path) for name in names)
+    else:
+        files = [path]
+    digest = hashlib.sha1()
+    for file in files:
+        digest.update(os.path.relpath(file, path).encode())
+        with open(file, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def stage_key(*parts):
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+
+
+class StageCache:
+    """Stage outputs pickled in a directory, one file per stage (the latest key wins)."""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path(self, stage, key):
+        return os.path.join(self.cache_dir, f"{stage}-{key}.pkl")
+
+    def run(self, stage, key, compute):
+        """The cached output of stage for key, computing (and storing) it if missing."""
+        path = self.path(stage, key)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            log(f"{stage:<12} cached")
+            return value
+
+        start = time.perf_counter()
+        value = compute()
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        for name in os.listdir(self.cache_dir):
+            if name.startswith(stage + "-") and name.endswith(".pkl") and name != os.path.basename(path):
+                os.remove(os.path.join(self.cache_dir, name))
+        log(f"{stage:<12} {time.perf_counter() - start:.1f}s")
+        return value
+
+
+def log(message):
+    print(message, file=sys.stderr)
+
+
+def load_frame(path):
+    """Parsed test cases from a csv or a Parquet dataset directory, cleaned as in the notebook."""
+    if os.path.isdir(path):
+        df = pd.read_parquet(path, columns=COLUMNS, partitioning=None)
+    else:
+        df = pd.read_csv(path, usecols=COLUMNS)
+    df = df.dropna(subset=["step_keywords", "num_steps", "duration", "result"])
+    df["result_encoded"] = df["result"].map({"PASS": 1, "FAIL": 0})
+    return df
+
+
+def featurize(df):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.preprocessing import MinMaxScaler
+
+    tfidf = TfidfVectorizer()
+    X_keywords = tfidf.fit_transform(df["step_keywords"])
+    scaler = MinMaxScaler()
+    X_steps = scaler.fit_transform(df[["num_steps"]])
+    X_features = sparse.hstack([X_keywords, sparse.csr_matrix(X_steps)], format="csr")
+    return tfidf, scaler, X_features
+
+
+def resample(X_features, y_class):
+    from imblearn.over_sampling import SMOTE
+
+    return SMOTE(random_state=RANDOM_STATE).fit_resample(X_features, y_class)
+
+
+def fit_classifier(X_resampled, y_resampled):
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.model_selection import train_test_split
+
+    X_train, _, y_train, _ = train_test_split(
+        X_resampled, y_resampled, test_size=TEST_SIZE, random_state=RANDOM_STATE
+    )
+    clf = LogisticRegression(class_weight="balanced", max_iter=CLF_MAX_ITER)
+    return clf.fit(X_train, y_train)
+
+
+def fit_regressor(X_features, y_reg, n_jobs=-1):
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.model_selection import train_test_split
+
+    X_train, _, y_train, _ = train_test_split(X_features, y_reg, test_size=TEST_SIZE, random_state=RANDOM_STATE)
+    reg = RandomForestRegressor(n_estimators=N_ESTIMATORS, random_state=RANDOM_STATE, n_jobs=n_jobs)
+    reg.fit(X_train, y_train)
+    # Trees do not depend on n_jobs; predicting in parallel would sum them in a varying order
+    reg.n_jobs = None
+    return reg
+
+
+def similar_case_details(df):
+    return {
+        row.test_id: {"steps": row.step_keywords.strip(), "duration": str(row.duration), "result": row.result}
+        for row in df.itertuples()
+    }
+
+
+def write_pickle(path, value):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(value, f)
+    os.replace(tmp_path, path)
+
+
+def train(input_path, out_dir, cache_dir=None, n_jobs=-1):
+    """Run the pipeline on input_path and write the artifacts to out_dir. Returns the row count."""
+    cache = StageCache(cache_dir or os.path.join(out_dir, CACHE_DIR))
+    df = load_frame(input_path)
+    test_ids = df["test_id"].tolist()
+
+    features_key = stage_key("featurize", input_fingerprint(input_path))
+    tfidf, scaler, X_features = cache.run("featurize", features_key, lambda: featurize(df))
+    resample_key = stage_key("resample", features_key, RANDOM_STATE)
+    classifier_key = stage_key("classifier", resample_key, TEST_SIZE, RANDOM_STATE, CLF_MAX_ITER)
+    regressor_key = stage_key("regressor", features_key, TEST_SIZE, RANDOM_STATE, N_ESTIMATORS)
+    similarity_key = stage_key("similarity", features_key)
+
+    def classifier():
+        X_resampled, y_resampled = cache.run(
+            "resample", resample_key, lambda: resample(X_features, df["result_encoded"])
+        )
+        return cache.run("classifier", classifier_key, lambda: fit_classifier(X_resampled, y_resampled))
+
+    with ThreadPoolExecutor(max_workers=3, thread_name_prefix="train") as pool:
+        clf = pool.submit(classifier)
+        reg = pool.submit(
+            cache.run, "regressor", regressor_key, lambda: fit_regressor(X_features, df["duration"], n_jobs)
+        )
+        similarity_index = pool.submit(
+            cache.run, "similarity", similarity_key, lambda: SimilarityIndex.build(X_features, test_ids)
+        )
+        clf, reg, similarity_index = clf.result(), reg.result(), similarity_index.result()
+
+    details = similar_case_details(df)
+    os.makedirs(out_dir, exist_ok=True)
+    for filename, value in [
+        ("clf.pkl", clf), ("reg.pkl", reg), ("tfidf.pkl", tfidf), ("scaler.pkl", scaler),
+        ("X_features.pkl", X_features), ("test_ids.pkl", test_ids), ("similar_case_details.pkl", details),
+    ]:
+        write_pickle(os.path.join(out_dir, filename), value)
+    similarity_index.save(os.path.join(out_dir, "similarity_index.pkl"))
+    publish_bundle(
+        os.path.join(out_dir, BUNDLE_DIR), tfidf=tfidf, scaler=scaler, clf=clf, reg=reg,
+        similarity_index=similarity_index, similar_case_details=details, sources=pickle_digests(out_dir)
+    )
+    return len(df)
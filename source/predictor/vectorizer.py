@@ -0,0 +1,279 @@
+import math
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+
+# Steps within step_keywords are separated by this; tokens never span it
+STEP_SEPARATOR = ";"
+
+# Distinct steps whose term counts are kept; the least recently used are evicted
+STEP_CACHE_SIZE = 50_000
+
+# From this many docs on, step counts are summed with one sparse product instead of per doc
+BATCH_MIN_DOCS = 32
+
+
+class StepCounts:
+    """
+    Step interning for the TF-IDF vectorizers. Suites reuse a small set of steps
+    ("Set ARM Switch is ON", "Send LB CONF Message", ...), so every distinct step is
+    tokenized once and its term counts (sorted columns, counts) are kept in a bounded
+    LRU. A case's term counts are the sum of its steps' counts.
+    """
+
+    def __init__(self, count_step, split=True, max_entries=STEP_CACHE_SIZE):
+        self.count_step = count_step  # step -> (sorted columns, counts)
+        self.split = split
+        self.max_entries = max_entries
+        self._steps = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._steps)
+
+    def steps(self, doc):
+        if not self.split:
+            return [doc]
+        return [step.strip() for step in doc.split(STEP_SEPARATOR)]
+
+    def get(self, step):
+        with self._lock:
+            counts = self._steps.get(step)
+            if counts is not None:
+                self._steps.move_to_end(step)
+                return counts
+        counts = self.count_step(step)
+        with self._lock:
+            self._steps[step] = counts
+            while len(self._steps) > self.max_entries:
+                self._steps.popitem(last=False)
+        return counts
+
+    def counts(self, doc):
+        """Term counts of one doc as {column: count}."""
+        total = {}
+        for step in self.steps(doc):
+            columns, counts = self.get(step)
+            for col, count in zip(columns, counts):
+                total[col] = total.get(col, 0) + count
+        return total
+
+    def count_matrix(self, docs, n_features):
+        """
+        Term counts of docs as a CSR matrix with sorted indices: the (doc x step)
+        occurrence matrix times the (step x term) counts of the distinct steps.
+        """
+        step_ids = {}
+        steps_per_doc = []
+        cols = []
+        for doc in docs:
+            steps = self.steps(doc)
+            steps_per_doc.append(len(steps))
+            cols.extend([step_ids.setdefault(step, len(step_ids)) for step in steps])
+        rows = np.repeat(np.arange(len(docs)), steps_per_doc)
+        # Duplicate (row, col) pairs add up, so a step repeated within a case counts twice
+        occurrences = sparse.csr_matrix(
+            (np.ones(len(cols)), (rows, cols)), shape=(len(docs), len(step_ids))
+        )
+
+        indptr = [0]
+        indices = []
+        data = []
+        for step in step_ids:
+            columns, counts = self.get(step)
+            indices.extend(columns)
+            data.extend(counts)
+            indptr.append(len(indices))
+        step_counts = sparse.csr_matrix(
+            (np.array(data, dtype=np.float64), np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int32)),
+            shape=(len(step_ids), n_features)
+        )
+        X = (occurrences @ step_counts).tocsr()
+        X.sort_indices()
+        return X
+
+
+def normalize_l2(X):
+    """
+    Scale the rows of a CSR matrix to unit L2 norm in place, with the arithmetic of
+    sklearn's normalize (squares summed left to right, rows of zeros left alone),
+    so the result is bit-identical to it.
+    """
+    lengths = np.diff(X.indptr)
+    starts = X.indptr[:-1]
+    norms = np.zeros(X.shape[0], dtype=np.float64)
+    for position in range(lengths.max(initial=0)):
+        rows = np.flatnonzero(lengths > position)
+        values = X.data[starts[rows] + position]
+        norms[rows] += values * values
+    norms = np.sqrt(norms)
+    norms[norms == 0.0] = 1.0
+    X.data /= np.repeat(norms, lengths)
+    return X
+
+
+class FrozenTfidf:
+    """
+    Inference-only copy of a fitted word-level TfidfVectorizer: token pattern,
+    vocabulary (as terms in column order) and idf vector. Term counts come from
+    StepCounts, so each distinct step is tokenized once and shared by every case
+    (and every batch) that contains it.
+    """
+
+    def __init__(self, terms, idf, token_pattern, lowercase=True, norm="l2"):
+        self.terms = terms
+        self.idf = idf
+        self.token_pattern = token_pattern
+        self.lowercase = lowercase
+        self.norm = norm
+        self._token_re = re.compile(token_pattern)
+        self._vocabulary = None
+        self._idf_list = None
+        self._steps = StepCounts(self._count_step, split=self._token_re.search(STEP_SEPARATOR) is None)
+
+    @property
+    def vocabulary(self):
+        # Built on first use so that opening a bundle stays cheap
+        if self._vocabulary is None:
+            self._vocabulary = {str(term): col for col, term in enumerate(self.terms)}
+        return self._vocabulary
+
+    @classmethod
+    def from_sklearn(cls, tfidf):
+        unsupported = (
+            tfidf.analyzer != "word" or tfidf.ngram_range != (1, 1) or tfidf.tokenizer is not None
+            or tfidf.preprocessor is not None or tfidf.stop_words is not None
+            or tfidf.strip_accents is not None or tfidf.sublinear_tf or not tfidf.use_idf
+        )
+        if unsupported:
+            raise ValueError("Only plain word-level TfidfVectorizer settings can be frozen")
+        terms = sorted(tfidf.vocabulary_, key=tfidf.vocabulary_.get)
+        return cls(np.array(terms), tfidf.idf_, tfidf.token_pattern, tfidf.lowercase, tfidf.norm)
+
+    def to_bundle(self):
+        arrays = {"terms": np.asarray(self.terms), "idf": np.asarray(self.idf)}
+        meta = {"token_pattern": self.token_pattern, "lowercase": self.lowercase, "norm": self.norm}
+        return arrays, meta
+
+    @classmethod
+    def from_bundle(cls, arrays, meta):
+        return cls(arrays["terms"], arrays["idf"], meta["token_pattern"], meta["lowercase"], meta["norm"])
+
+    def transform(self, docs):
+        """TF-IDF rows of docs: the same CSR matrix as TfidfVectorizer.transform."""
+        docs = [doc.lower() for doc in docs] if self.lowercase else list(docs)
+        if len(docs) < BATCH_MIN_DOCS:
+            X = self._rows(docs)
+        else:
+            X = self._steps.count_matrix(docs, len(self.idf))
+            X.data *= self.idf[X.indices]
+            if self.norm == "l2":
+                normalize_l2(X)
+        if self.norm is not None and self.norm != "l2":
+            X = normalize(X, norm=self.norm, copy=False)
+        return X
+
+    def _rows(self, docs):
+        if self._idf_list is None:
+            self._idf_list = np.asarray(self.idf, dtype=np.float64).tolist()
+        indptr = [0]
+        indices = []
+        values = []
+        for doc in docs:
+            columns, weights = self._row(doc)
+            indices.extend(columns)
+            values.extend(weights)
+            indptr.append(len(indices))
+        return sparse.csr_matrix(
+            (np.array(values, dtype=np.float64), np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int32)),
+            shape=(len(docs), len(self.idf))
+        )
+
+    def _row(self, doc):
+        """Sorted columns and weights of one doc, computed like TfidfTransformer and normalize do."""
+        counts = self._steps.counts(doc)
+        columns = sorted(counts)
+        weights = [counts[col] * self._idf_list[col] for col in columns]
+        if self.norm == "l2":
+            norm = 0.0
+            for weight in weights:
+                norm += weight * weight
+            if norm != 0.0:
+                norm = math.sqrt(norm)
+                weights = [weight / norm for weight in weights]
+        return columns, weights
+
+    def _count_step(self, step):
+        vocabulary = self.vocabulary
+        counts = {}
+        for token in self._token_re.findall(step):
+            col = vocabulary.get(token)
+            if col is not None:
+                counts[col] = counts.get(col, 0) + 1
+        columns = sorted(counts)
+        return columns, [counts[col] for col in columns]
+
+
+class HashedTfidf:
+    """
+    Vocabulary-free TF-IDF used by incrementally trained bundles (see predictor.online):
+    tokens are hashed into len(idf) columns and weighted by an idf vector that the
+    trainer recomputes from running document frequencies.
+    """
+
+    def __init__(self, idf, token_pattern=r"(?u)\b\w\w+\b", lowercase=True, norm="l2"):
+        self.idf = idf
+        self.token_pattern = token_pattern
+        self.lowercase = lowercase
+        self.norm = norm
+        self._hasher = HashingVectorizer(
+            n_features=len(idf), token_pattern=token_pattern, lowercase=lowercase,
+            alternate_sign=False, norm=None
+        )
+        self._steps = self._step_counts()
+
+    def to_bundle(self):
+        return {"idf": np.asarray(self.idf)}, {
+            "token_pattern": self.token_pattern, "lowercase": self.lowercase, "norm": self.norm
+        }
+
+    @classmethod
+    def from_bundle(cls, arrays, meta):
+        return cls(arrays["idf"], meta["token_pattern"], meta["lowercase"], meta["norm"])
+
+    def __getstate__(self):
+        # Trainer state is pickled (see OnlineTrainer.save); the step cache is rebuilt on use
+        state = self.__dict__.copy()
+        state.pop("_steps", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._steps = self._step_counts()
+
+    def _step_counts(self):
+        return StepCounts(self._count_step, split=re.search(self.token_pattern, STEP_SEPARATOR) is None)
+
+    def counts(self, docs):
+        """Raw term counts per hashed column, before idf weighting."""
+        return self._steps.count_matrix(list(docs), len(self.idf))
+
+    def _count_step(self, step):
+        row = self._hasher.transform([step])
+        return row.indices.tolist(), row.data.tolist()
+
+    def weight(self, counts):
+        X = sparse.csr_matrix(counts, dtype=np.float64, copy=True)
+        X.data *= self.idf[X.indices]
+        if self.norm is not None:
+            X = normalize(X, norm=self.norm, copy=False)
+        return X
+
+    def transform(self, docs):
+        return self.weight(self.counts(docs))